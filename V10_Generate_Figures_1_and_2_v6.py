@@ -14,6 +14,11 @@ Original file is located at
 # Date: 2026-03-11
 # ==============================================================================
 
+import os
+import copy
+import json
+import hashlib
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 import time
@@ -31,27 +36,166 @@ try:
 except ImportError:
     xp = np
 
+# --- FFT Backend (pyFFTW > scipy.fft > numpy.fft on CPU; cupyx.scipy.fft on GPU) ---
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+try:
+    if xp is np:
+        import scipy.fft as xp_fft
+    else:
+        import cupyx.scipy.fft as xp_fft
+except ImportError:
+    xp_fft = None
+
+class FFTWorkspace:
+    """Persistent complex buffer with in-place forward/inverse FFTs over its last three axes."""
+    def __init__(self, shape, dtype=np.complex128, workers=None):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.axes = (-3, -2, -1)
+        if xp is np and pyfftw is not None:
+            self.backend = 'pyfftw'
+            self.buf = pyfftw.empty_aligned(shape, dtype=dtype)
+            # Plans are built before the buffer holds data (FFTW_MEASURE overwrites it)
+            flags = ('FFTW_MEASURE',)
+            self._fw = pyfftw.FFTW(self.buf, self.buf, axes=self.axes, direction='FFTW_FORWARD', threads=self.workers, flags=flags)
+            self._bw = pyfftw.FFTW(self.buf, self.buf, axes=self.axes, direction='FFTW_BACKWARD', threads=self.workers, flags=flags)
+        else:
+            self.buf = xp.empty(shape, dtype=dtype)
+            if xp_fft is not None:
+                self.backend = xp_fft.__name__
+                self._kw = {'axes': self.axes, 'overwrite_x': True}
+                if xp is np: self._kw['workers'] = self.workers
+            else:
+                self.backend = 'numpy.fft'
+
+    def _run(self, fn):
+        out = fn(self.buf, **self._kw) if self.backend != 'numpy.fft' else fn(self.buf, axes=self.axes)
+        # overwrite_x transforms in place for complex input; copy back only if a backend did not
+        ptr = (lambda a: a.ctypes.data) if xp is np else (lambda a: a.data.ptr)
+        if ptr(out) != ptr(self.buf): self.buf[...] = out
+
+    def forward(self):
+        if self.backend == 'pyfftw': self._fw()
+        else: self._run(xp_fft.fftn if xp_fft is not None else xp.fft.fftn)
+
+    def backward(self):
+        if self.backend == 'pyfftw': self._bw()  # normalised like ifftn
+        else: self._run(xp_fft.ifftn if xp_fft is not None else xp.fft.ifftn)
+
 # ==============================================================================
 # 2. Simulation Core (Same as v5)
 # ==============================================================================
 class SPGPE_Propagator:
-    def __init__(self, L=100.0, N=64, T=0.05, dt=0.01, gamma=0.1):
+    def __init__(self, L=100.0, N=64, T=0.05, dt=0.01, gamma=0.1, seed=None, fft_workers=None, pulse_time=5.0, batch=None, check_every=1,
+                 dtype=np.complex128, noise_dtype=None):
         self.L = L; self.N = N; self.T = T; self.dt = dt; self.gamma = gamma
+        # complex64 fields halve memory traffic; noise defaults to the matching real precision
+        self.dtype = np.dtype(dtype)
+        self.real_dtype = np.dtype(self.dtype.char.lower())
+        self.noise_dtype = np.dtype(noise_dtype) if noise_dtype is not None else self.real_dtype
+        self.pulse_time = pulse_time
         self.dx = L / N
+        shape = self._init_grid(batch, fft_workers)
+
+        # Constant split-step operators, built once:
+        #   exp(c*K^2) = exp(c*(kx^2+ky^2)) exp(c*kz^2)  -> (N,N,1) and (1,1,N) factors
+        #   exp(c_V*(V_ext - |psi|^2)) = exp(c_V*V_ext) exp(-c_V*|psi|^2)  -> (1,1,N) pulse factor
+        self._ops_cache = {}
+        self.exp_K_axes, self._c_V, self._pulse_phase = self._ops(dt)
+        self._noise_amp = float(np.sqrt(2 * self.gamma * self.T * self.dt / (self.dx**3))) if T > 0 else 0.0
+        # Noise per unit Brownian increment: noise_amp = amp_dW * sqrt(dt)
+        self._amp_dW = float(np.sqrt(2 * self.gamma * self.T / (self.dx**3))) if T > 0 else 0.0
+
+        self._dens = xp.empty(shape, dtype=self.real_dtype)
+        self._phase = xp.empty(shape, dtype=self.dtype)
+        self._noise = xp.empty(shape, dtype=self.noise_dtype)
+        # Single-precision complex exp has no fast kernel; build the phase from real exp/cos/sin instead
+        self._phase_parts = (xp.empty(shape, dtype=self.real_dtype), xp.empty(shape, dtype=self.real_dtype)) \
+            if self.dtype == np.complex64 else None
+        self.rng = self._make_rng(seed)
+
+        noise_scale = float(np.sqrt(0.5 * T / (self.dx**3))) if T > 0 else 0.0
+        self._randn_into(self._noise); self.psi.real[...] = noise_scale * self._noise
+        self._randn_into(self._noise); self.psi.imag[...] = noise_scale * self._noise
+        self._init_run_state(check_every)
+
+    def _init_grid(self, batch, fft_workers):
+        """Coordinates, wavenumbers and the psi buffer; returns the (local) field shape."""
+        N, L = self.N, self.L
         self.x = xp.linspace(-L/2, L/2, N, endpoint=False)
         self.y = xp.linspace(-L/2, L/2, N, endpoint=False)
         self.z = xp.linspace(-L/2, L/2, N, endpoint=False)
-        self.X, self.Y, self.Z = xp.meshgrid(self.x, self.y, self.z, indexing='ij')
+        # Broadcastable 1-D axes (N,1,1)/(1,N,1)/(1,1,N) instead of full N^3 meshgrids
+        self.X, self.Y, self.Z = xp.meshgrid(self.x, self.y, self.z, indexing='ij', sparse=True)
         self.k = 2 * xp.pi * xp.fft.fftfreq(N, d=self.dx)
-        self.KX, self.KY, self.KZ = xp.meshgrid(self.k, self.k, self.k, indexing='ij')
-        self.K2 = self.KX**2 + self.KY**2 + self.KZ**2
+        self.KX, self.KY, self.KZ = xp.meshgrid(self.k, self.k, self.k, indexing='ij', sparse=True)
 
-        noise_scale = xp.sqrt(0.5 * T / (self.dx**3)) if T > 0 else 0.0
-        self.psi = noise_scale * (xp.random.randn(N, N, N) + 1j * xp.random.randn(N, N, N))
-        self.exp_K = xp.exp(-0.5j * self.dt * self.K2)
+        # Persistent workspace: psi lives in the FFT buffer and is only ever updated in place.
+        # With batch=B the field carries a leading realisation axis (B,N,N,N); all operators broadcast over it.
+        shape = (N, N, N) if batch is None else (batch, N, N, N)
+        self._fft = FFTWorkspace(shape, dtype=self.dtype, workers=fft_workers)
+        self.psi = self._fft.buf
+        return shape
+
+    def _init_run_state(self, check_every):
         self.is_crashed = False
 
+        # Health checks run every check_every steps; between checks the loop is reduction-free.
+        # A failed check rolls back to the last good checkpoint (psi + RNG state) and replays with
+        # per-step checks, so the crash is flagged at the same step as with check_every=1.
+        # Callers drive the loop by n_steps, which moves backwards on rollback.
+        self.check_every = max(1, int(check_every))
+        self.n_steps = 0
+        self._replay_until = -1
+        self._ckpt = None
+        self._ckpt_psi = xp.empty_like(self.psi) if self.check_every > 1 else None
+
+        # Adaptive step-doubling state (step_adaptive); tolerances and dt bounds may be overridden
+        self.rtol, self.atol = 1e-3, 1e-8
+        self.dt_adapt, self.dt_min, self.dt_max = self.dt, self.dt / 64, self.dt * 64
+        self.n_accepted = self.n_rejected = self.n_fft_pairs = 0
+        self._dW_stack = []  # pending Brownian increments (h, dW) for the upcoming intervals; last = next
+        self._psi0 = self._psi_full = None
+
+    @property
+    def K2(self):
+        # Full |k|^2 on demand (not kept resident)
+        return self.KX**2 + self.KY**2 + self.KZ**2
+
+    def _ops(self, dt):
+        """Split-step operators for step size dt, built once per distinct dt:
+        exp(c*K^2) = exp(c*(kx^2+ky^2)) exp(c*kz^2)  -> (N,N,1) and (1,1,N) factors
+        exp(c_V*(V_ext - |psi|^2)) = exp(c_V*V_ext) exp(-c_V*|psi|^2)  -> (1,1,N) pulse factor"""
+        ops = self._ops_cache.get(dt)
+        if ops is None:
+            c_K = -1j * (1 - 1j * self.gamma) * 0.5 * dt
+            c_V = -1j * (1 - 1j * self.gamma) * dt
+            ops = ((xp.exp(c_K * (self.KX**2 + self.KY**2)).astype(self.dtype),
+                    xp.exp(c_K * self.KZ**2).astype(self.dtype)), c_V,
+                   xp.exp(c_V * self.apply_pulse(0.0, pulse_time=np.inf)).astype(self.dtype))
+            self._ops_cache[dt] = ops
+        return ops
+
+    def _snapshot(self):
+        self._ckpt_psi[...] = self.psi
+        self._ckpt = {'n': self.n_steps, 'rng': copy.deepcopy(self.rng.bit_generator.state)}
+
+    def _restore(self):
+        self.psi[...] = self._ckpt_psi
+        self.rng.bit_generator.state = copy.deepcopy(self._ckpt['rng'])
+        self.n_steps = self._ckpt['n']
+
+    def _make_rng(self, seed):
+        return xp.random.default_rng(seed)
+
+    def _randn_into(self, out):
+        try: self.rng.standard_normal(out=out, dtype=out.dtype)
+        except TypeError: out[...] = self.rng.standard_normal(out.shape, dtype=out.dtype)
+
     def apply_pulse(self, t, pulse_time=5.0, amplitude=50.0):
+        # Pulse depends on z only: returns a (1,1,N) profile broadcast over x-y
         if t < pulse_time:
             z0 = -self.L / 4.0
             width = 5.0
@@ -60,134 +204,671 @@ class SPGPE_Propagator:
 
     def step(self, t):
         if self.is_crashed: return
-        V_ext = self.apply_pulse(t)
-        density = xp.abs(self.psi)**2
-
-        if xp.any(xp.isnan(density)) or xp.max(density) > 1e6:
-            self.is_crashed = True
-            return
-
-        V_eff = V_ext - 1.0 * density
-        op_V = -1j * (1 - 1j * self.gamma) * V_eff * self.dt
-        self.psi *= xp.exp(op_V)
-        self.psi = xp.fft.fftn(self.psi)
-        op_K = -1j * (1 - 1j * self.gamma) * (self.K2 / 2) * self.dt
-        self.psi *= xp.exp(op_K)
-        self.psi = xp.fft.ifftn(self.psi)
+        psi, density, phase = self.psi, self._dens, self._phase
+        xp.abs(psi, out=density); xp.square(density, out=density)
+        n = self.n_steps
+        on_cadence = n % self.check_every == 0
+        if on_cadence or n < self._replay_until:
+            if not self._healthy(density):
+                if self._ckpt is not None and self._ckpt['n'] < n and n > self._replay_until:
+                    self._replay_until = n
+                    self._restore()
+                    return
+                if self._mark_crash(density): return
+            elif on_cadence and self._ckpt_psi is not None:
+                self._snapshot()
+        self._propagate(t, self.exp_K_axes, self._c_V, self._pulse_phase)
 
         if self.T > 0:
-            noise_amp = xp.sqrt(2 * self.gamma * self.T * self.dt / (self.dx**3))
-            noise = noise_amp * (xp.random.randn(self.N, self.N, self.N) + 1j * xp.random.randn(self.N, self.N, self.N))
-            self.psi += noise
+            noise = self._noise
+            self._randn_into(noise); noise *= self._noise_amp; psi.real[...] += noise
+            self._randn_into(noise); noise *= self._noise_amp; psi.imag[...] += noise
+        self.n_steps += 1
+
+    def _propagate(self, t, exp_K_axes, c_V, pulse_phase):
+        # psi *= exp(c_V * (V_ext - density)), then the kinetic factors in k-space; expects self._dens filled
+        psi, phase = self.psi, self._phase
+        if self._phase_parts is None:
+            xp.multiply(self._dens, -c_V, out=phase)
+            xp.exp(phase, out=phase)
+        else:
+            # exp((a+ib)*rho) = exp(a*rho) * (cos(b*rho) + i sin(b*rho))
+            amp, ang = self._phase_parts
+            xp.multiply(self._dens, (-c_V).real, out=amp); xp.exp(amp, out=amp)
+            xp.multiply(self._dens, (-c_V).imag, out=ang)
+            re, im = phase.real, phase.imag
+            xp.cos(ang, out=re); xp.sin(ang, out=im)
+            re *= amp; im *= amp
+        if t < self.pulse_time: phase *= pulse_phase
+        psi *= phase
+        self._apply_kinetic(exp_K_axes)
+
+    def _apply_kinetic(self, exp_K_axes):
+        self._fft.forward()
+        for f in exp_K_axes: self.psi *= f
+        self._fft.backward()
+
+    # --- Adaptive stepping ----------------------------------------------------
+    # Step doubling: one step of dt vs two of dt/2 driven by the same Brownian path (the full step
+    # uses dW = dW1 + dW2), so the difference measures the splitting error, not the noise.
+    # On rejection the two half-step increments are kept and consumed by the smaller steps, and
+    # longer pending increments are split by Brownian bridge, so the noise stays N(0, dt) per step
+    # and rejections do not bias it.
+    # Cost: every attempt is 3 FFT pairs (one dt step plus two dt/2 steps) against 1 for a fixed step,
+    # so it only pays off when the accepted dt averages well above 3x the fixed dt, i.e. for stiff
+    # transients followed by long smooth tails. For the figure scenarios fixed stepping is cheaper.
+
+    def _randn_complex(self):
+        z = xp.empty(self.psi.shape, dtype=self.dtype)
+        self._randn_into(self._noise); z.real[...] = self._noise
+        self._randn_into(self._noise); z.imag[...] = self._noise
+        return z
+
+    def _bridge(self, h, D, h1):
+        # Split increment D over [0,h] into [0,h1] and [h1,h] conditioned on the sum
+        a = self._randn_complex()
+        a *= np.sqrt(h1 * (h - h1) / h); a += (h1 / h) * D
+        return a, D - a
+
+    def _take_dW(self, dt):
+        if not self._dW_stack:
+            dW = self._randn_complex(); dW *= np.sqrt(dt)
+            return dt, dW
+        h, D = self._dW_stack.pop()
+        if h <= dt * (1 + 1e-12): return h, D
+        a, b = self._bridge(h, D, dt)
+        self._dW_stack.append((h - dt, b))
+        return dt, a
+
+    def _substep(self, t, dt, dW):
+        xp.abs(self.psi, out=self._dens); xp.square(self._dens, out=self._dens)
+        self._propagate(t, *self._ops(dt))
+        if self.T > 0:
+            xp.multiply(dW, self._amp_dW, out=self._phase); self.psi += self._phase
+
+    def step_adaptive(self, t, t_max=None):
+        """Advances by one accepted step from time t (never past t_max or across pulse_time); returns the dt taken, 0.0 once crashed."""
+        if self.is_crashed: return 0.0
+        psi = self.psi
+        xp.abs(psi, out=self._dens); xp.square(self._dens, out=self._dens)
+        if not self._healthy(self._dens) and self._mark_crash(self._dens): return 0.0
+        if self._psi0 is None: self._psi0, self._psi_full = xp.empty_like(psi), xp.empty_like(psi)
+        self._psi0[...] = psi
+        while True:
+            dt = self.dt_adapt if t_max is None else min(self.dt_adapt, t_max - t)
+            if t < self.pulse_time: dt = min(dt, self.pulse_time - t)  # the pulse switches off at a step boundary
+            dt, dW = self._take_dW(dt)
+            dW1, dW2 = self._bridge(dt, dW, dt / 2)
+            self._substep(t, dt, dW); self._psi_full[...] = psi
+            psi[...] = self._psi0
+            self._substep(t, dt / 2, dW1); self._substep(t + dt / 2, dt / 2, dW2)
+            self.n_fft_pairs += 3
+            self._psi_full -= psi
+            err = self._step_error(self._psi_full, psi)
+            if err <= 1.0 or dt <= self.dt_min:
+                self.n_accepted += 1
+                # Lie splitting: local error ~ dt^2, so doubling dt roughly quadruples err
+                if err < 0.2: self.dt_adapt = min(2 * self.dt_adapt, self.dt_max)
+                return dt
+            self.n_rejected += 1
+            psi[...] = self._psi0
+            self._dW_stack += [(dt / 2, dW2), (dt / 2, dW1)]
+            self.dt_adapt = dt / 2
+
+    def _step_error(self, diff, ref):
+        # err = ||psi_dt - psi_dt/2|| / (atol*sqrt(n) + rtol*||psi_dt/2||); NaN from a blow-up rejects
+        num = float(xp.sqrt(xp.sum(xp.abs(diff)**2)))
+        den = self.atol * np.sqrt(ref.size) + self.rtol * float(xp.sqrt(xp.sum(xp.abs(ref)**2)))
+        return num / den
+
+    def _healthy(self, density):
+        # Single fused pass: max() propagates NaN, and NaN <= 1e6 is False
+        return bool(xp.max(density) <= 1e6)
+
+    def _mark_crash(self, density):
+        self.is_crashed = True
+        return True
+
+    def norm(self):
+        return float(xp.sum(xp.abs(self.psi.astype(np.complex128))**2)) * self.dx**3
+
+    def energy(self):
+        """GP energy sum(|grad psi|^2/2 - |psi|^4/2) dx^3, accumulated in double precision (pulse excluded)."""
+        psi = self.psi.astype(np.complex128)
+        psi_k = xp.fft.fftn(psi, axes=(-3, -2, -1))
+        e_kin = 0.5 * float(xp.sum(self.K2 * xp.abs(psi_k)**2)) / self.N**3
+        e_int = -0.5 * float(xp.sum(xp.abs(psi)**4))
+        return (e_kin + e_int) * self.dx**3
+
+    def _z_sum(self):
+        return xp.sum(xp.abs(self.psi)**2, axis=(-3, -2))
 
     def get_z_profile(self):
         if self.is_crashed: return xp.full(self.N, xp.nan)
-        return xp.sum(xp.abs(self.psi)**2, axis=(0, 1))
+        return self._z_sum()
 
     def calculate_signal_contrast(self):
         if self.is_crashed: return 0.0
-        z_profile = xp.sum(xp.abs(self.psi)**2, axis=(0, 1))
+        z_profile = self._z_sum()
         target_profile = z_profile[int(3 * self.N / 4):]
         if len(target_profile) == 0: return 0.0
         peak, mean = xp.max(target_profile), xp.mean(target_profile)
         if mean == 0: return 0.0
         return float((peak / mean) - 1.0)
 
-def run_scenario(scenario_name, T_val, steps=2000, dt=0.05):
-    sim = SPGPE_Propagator(L=100.0, N=64, T=T_val, dt=dt, gamma=0.1)
-    history = []
-    for i in range(steps):
+class SPGPE_Ensemble(SPGPE_Propagator):
+    """Independent noise realisations of SPGPE_Propagator propagated together on a leading batch axis.
+
+    Each member draws from its own Generator(seed), so member b reproduces a single
+    SPGPE_Propagator(seed=seeds[b]) run; FFTs are batched over the realisation axis.
+    A member that blows up is zeroed and masked (NaN z-profile, zero contrast) while the rest continue.
+    """
+    def __init__(self, seeds, **kwargs):
+        self.seeds = [int(s) for s in seeds]; self.B = len(self.seeds)
+        self.crashed = np.zeros(self.B, dtype=bool)
+        super().__init__(batch=self.B, **kwargs)
+
+    def _make_rng(self, seed):
+        self.rngs = [xp.random.default_rng(s) for s in self.seeds]
+        return None
+
+    def _snapshot(self):
+        self._ckpt_psi[...] = self.psi
+        self._ckpt = {'n': self.n_steps, 'crashed': self.crashed.copy(),
+                      'rng': [copy.deepcopy(r.bit_generator.state) for r in self.rngs]}
+
+    def _restore(self):
+        self.psi[...] = self._ckpt_psi
+        self.crashed[...] = self._ckpt['crashed']
+        for r, st in zip(self.rngs, self._ckpt['rng']): r.bit_generator.state = copy.deepcopy(st)
+        self.n_steps = self._ckpt['n']
+
+    def _randn_into(self, out):
+        for b, rng in enumerate(self.rngs):
+            try: rng.standard_normal(out=out[b], dtype=out.dtype)
+            except TypeError: out[b] = rng.standard_normal(out[b].shape, dtype=out.dtype)
+
+    def _bad_members(self, density):
+        peak = to_numpy(xp.max(density.reshape(self.B, -1), axis=1))
+        return ~(peak <= 1e6)  # NaN-propagating max: catches NaN and blow-up in one reduction
+
+    def _healthy(self, density):
+        return not (self._bad_members(density) & ~self.crashed).any()
+
+    def _mark_crash(self, density):
+        self.crashed |= self._bad_members(density)
+        self._zero_crashed(density)
+        self.is_crashed = bool(self.crashed.all())
+        return self.is_crashed
+
+    def _zero_crashed(self, density=None):
+        # density too, or _propagate rebuilds psi from the member's NaN density
+        mask = xp.asarray(self.crashed)
+        self.psi[mask] = 0
+        if density is not None: density[mask] = 0
+
+    def step(self, t):
+        super().step(t)
+        if self.crashed.any() and not self.is_crashed: self._zero_crashed()  # noise would revive a zeroed member
+
+    def step_adaptive(self, t, t_max=None):
+        dt = super().step_adaptive(t, t_max)
+        if self.crashed.any() and not self.is_crashed: self._zero_crashed()
+        return dt
+
+    def get_z_profile(self):
+        prof = xp.sum(xp.abs(self.psi)**2, axis=(-3, -2))
+        prof[xp.asarray(self.crashed)] = xp.nan
+        return prof
+
+    def calculate_signal_contrast(self):
+        z_profile = to_numpy(xp.sum(xp.abs(self.psi)**2, axis=(-3, -2)))
+        target = z_profile[:, int(3 * self.N / 4):]
+        if target.shape[1] == 0: return np.zeros(self.B)
+        peak, mean = target.max(axis=1), target.mean(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            c = peak / mean - 1.0
+        return np.where(self.crashed | ~np.isfinite(c), 0.0, c)
+
+# ==============================================================================
+# 2b. Distributed backend (MPI slab decomposition, CPU/NumPy only)
+# ==============================================================================
+class SlabFFT:
+    """3-D FFT of an (N,N,N) field split into x-slabs over MPI ranks (rank r holds rows [r*n, (r+1)*n)).
+
+    forward(a): FFT over (y,z) in place, Alltoall transpose, FFT over x -> k-space slab in kbuf,
+    laid out (kx, ky_local, kz). backward(out) reverses it into the x-slab `out` (ifftn normalisation).
+    """
+    def __init__(self, comm, N, dtype=np.complex128, workers=None):
+        self.comm, self.N = comm, N
+        self.P, self.rank = comm.Get_size(), comm.Get_rank()
+        if N % self.P: raise ValueError(f"N={N} is not divisible by the number of ranks ({self.P})")
+        self.n = N // self.P
+        self.workers = workers if workers is not None else 1
+        self._fft = xp_fft if xp_fft is not None else np.fft
+        self._kw = {'overwrite_x': True, 'workers': self.workers} if xp_fft is not None else {}
+        self.kbuf = np.empty((N, self.n, N), dtype=dtype)
+        self._send = np.empty((self.P, self.n, self.n, N), dtype=dtype)
+        self._recv = np.empty_like(self._send)
+
+    def _inplace(self, fn, a, **kw):
+        out = fn(a, **kw, **self._kw)
+        if out is not a: a[...] = out
+
+    def forward(self, a):
+        P, n, N = self.P, self.n, self.N
+        self._inplace(self._fft.fftn, a, axes=(1, 2))
+        self._send[...] = a.reshape(n, P, n, N).transpose(1, 0, 2, 3)  # y-block j -> rank j
+        self.comm.Alltoall(self._send, self._recv)
+        k = self.kbuf
+        k[...] = self._recv.reshape(N, n, N)  # x-blocks from every rank stacked in order
+        self._inplace(self._fft.fft, k, axis=0)
+        return k
+
+    def backward(self, out):
+        P, n, N = self.P, self.n, self.N
+        k = self.kbuf
+        self._inplace(self._fft.ifft, k, axis=0)
+        self._send[...] = k.reshape(P, n, n, N)  # x-block j -> rank j
+        self.comm.Alltoall(self._send, self._recv)
+        out[...] = self._recv.transpose(1, 0, 2, 3).reshape(n, N, N)
+        self._inplace(self._fft.ifftn, out, axes=(1, 2))
+        return out
+
+class SPGPE_Slab(SPGPE_Propagator):
+    """SPGPE_Propagator with psi distributed as x-slabs (n, N, N) across the ranks of `comm`.
+
+    The potential step and noise are rank-local; the kinetic step goes through SlabFFT, and the
+    step_adaptive error norm is reduced over all ranks.
+    Each rank draws noise from SeedSequence(seed).spawn(P)[rank], so runs are reproducible
+    for a fixed rank count (but not bitwise equal to the single-process stream).
+    """
+    def __init__(self, comm, L=100.0, N=64, T=0.05, dt=0.01, gamma=0.1, seed=None, fft_workers=None,
+                 pulse_time=5.0, check_every=1, dtype=np.complex128):
+        if xp is not np: raise RuntimeError("SPGPE_Slab runs on NumPy (CPU) only")
+        self.comm = comm
+        super().__init__(L=L, N=N, T=T, dt=dt, gamma=gamma, seed=seed, fft_workers=fft_workers,
+                         pulse_time=pulse_time, check_every=check_every, dtype=dtype)
+
+    def _init_grid(self, batch, fft_workers):
+        N, L = self.N, self.L
+        self._slab = SlabFFT(self.comm, N, self.dtype, workers=fft_workers)
+        r, n = self._slab.rank, self._slab.n
+        grid = np.linspace(-L/2, L/2, N, endpoint=False)
+        self.x, self.y, self.z = grid[r*n:(r+1)*n], grid, grid
+        self.X, self.Y, self.Z = np.meshgrid(self.x, self.y, self.z, indexing='ij', sparse=True)
+        self.k = 2 * np.pi * np.fft.fftfreq(N, d=self.dx)
+        # k-space slab layout (kx, ky_local, kz): the (kx^2+ky^2) factor is (N,n,1)
+        self.KX, self.KY, self.KZ = np.meshgrid(self.k, self.k[r*n:(r+1)*n], self.k, indexing='ij', sparse=True)
+        self.psi = np.empty((n, N, N), dtype=self.dtype)
+        return self.psi.shape
+
+    def _make_rng(self, seed):
+        r = self._slab.rank
+        if seed is None: seed = self.comm.bcast(np.random.SeedSequence().entropy if r == 0 else None, root=0)
+        return np.random.default_rng(np.random.SeedSequence(seed).spawn(self._slab.P)[r])
+
+    def _apply_kinetic(self, exp_K_axes):
+        k = self._slab.forward(self.psi)
+        for f in exp_K_axes: k *= f
+        self._slab.backward(self.psi)
+
+    def _healthy(self, density):
+        # Collective: every rank must take the same rollback/crash branch
+        return all(self.comm.allgather(bool(np.max(density) <= 1e6)))
+
+    def _z_sum(self):
+        local = np.ascontiguousarray(np.sum(np.abs(self.psi)**2, axis=(0, 1)), dtype=np.float64)
+        out = np.empty_like(local)
+        self.comm.Allreduce(local, out)
+        return out
+
+    def norm(self):
+        return float(np.sum(self._z_sum())) * self.dx**3
+
+    def energy(self):
+        self._phase[...] = self.psi
+        k = self._slab.forward(self._phase)
+        e_kin = 0.5 * float(np.sum(self.K2 * np.abs(k.astype(np.complex128))**2)) / self.N**3
+        e_int = -0.5 * float(np.sum(np.abs(self.psi.astype(np.complex128))**4))
+        return self.comm.allreduce(e_kin + e_int) * self.dx**3
+
+    def _step_error(self, diff, ref):
+        # Global norms, so every rank accepts/rejects the same step and keeps the same dt
+        local = np.array([np.sum(np.abs(diff)**2), np.sum(np.abs(ref)**2)], dtype=np.float64)
+        tot = np.empty_like(local)
+        self.comm.Allreduce(local, tot)
+        return float(np.sqrt(tot[0])) / (self.atol * np.sqrt(self.N**3) + self.rtol * float(np.sqrt(tot[1])))
+
+def run_slab(N=128, steps=100, T_val=0.0534, dt=0.05, seed=0, fft_workers=1, check_every=50, adaptive=False, rtol=1e-3):
+    """Distributed propagation benchmark; launch with `mpirun -n P python <script> --slab N`.
+    With adaptive=True it covers the same physical time (steps*dt) with step_adaptive
+    (3 FFT pairs per attempted step; compare fft_pairs with steps)."""
+    from mpi4py import MPI
+    comm = MPI.COMM_WORLD
+    sim = SPGPE_Slab(comm, L=100.0, N=N, T=T_val, dt=dt, gamma=0.1, seed=seed,
+                     fft_workers=fft_workers, check_every=check_every)
+    comm.Barrier(); t0 = MPI.Wtime()
+    if adaptive:
+        sim.rtol, t, t_end = rtol, 0.0, steps * dt
+        while t < t_end * (1 - 1e-12) and not sim.is_crashed:
+            t += sim.step_adaptive(t, t_max=t_end)
+        n = sim.n_accepted
+    else:
+        while sim.n_steps < steps and not sim.is_crashed:
+            sim.step(sim.n_steps * dt)
+        n = sim.n_steps
+    comm.Barrier(); elapsed = MPI.Wtime() - t0
+    contrast = sim.calculate_signal_contrast()
+    rep = {'N': N, 'ranks': comm.Get_size(), 'fft_workers': fft_workers, 'steps': n,
+           'seconds': elapsed, 'steps_per_s': n / elapsed, 'contrast': contrast, 'crashed': sim.is_crashed}
+    if adaptive: rep.update(rejected=sim.n_rejected, fft_pairs=sim.n_fft_pairs)
+    if comm.Get_rank() == 0: print(json.dumps(rep))
+    return rep
+
+def to_numpy(a):
+    return a if xp is np else cp.asnumpy(a)
+
+class HistoryWriter:
+    """Fixed-size (rows, N) z-profile history streamed to disk, NaN-prefilled.
+
+    '.npy' paths use a memory-mapped array (np.load(path, mmap_mode='r') works mid-run);
+    '.h5'/'.hdf5' paths use a chunked, optionally compressed h5py dataset opened in SWMR mode.
+    path=None keeps an in-memory array. Rows are flushed every flush_every writes.
+    """
+    def __init__(self, path, rows, N, compression=None, chunk_rows=64, flush_every=50):
+        self.path = path; self.rows = rows; self.N = N
+        self.flush_every = max(1, int(flush_every)); self._dirty = 0
+        self._h5 = None
+        if path is None:
+            self.data = np.full((rows, N), np.nan)
+        elif str(path).endswith(('.h5', '.hdf5')):
+            import h5py  # optional dependency, only needed for HDF5 output
+            self._h5 = h5py.File(path, 'w', libver='latest')
+            self.data = self._h5.create_dataset('history', shape=(rows, N), dtype='f8', fillvalue=np.nan,
+                                                chunks=(max(1, min(chunk_rows, rows)), N), compression=compression)
+            self._h5.swmr_mode = True
+        else:
+            if compression: raise ValueError("compression needs an HDF5 path (.h5/.hdf5)")
+            self.data = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(rows, N))
+            self.data[...] = np.nan
+            self.data.flush()
+
+    def write(self, row, prof):
+        self.data[row] = prof
+        self._dirty += 1
+        if self._dirty >= self.flush_every: self.flush()
+
+    def fill_nan(self, start):
+        if start < self.rows: self.data[start:] = np.nan
+        self.flush()
+
+    def flush(self):
+        self._dirty = 0
+        if self._h5 is not None: self._h5.flush()
+        elif self.path is not None: self.data.flush()
+
+    def close(self):
+        """Flushes and returns the history (read-only memmap for .npy, in-memory array otherwise)."""
+        self.flush()
+        if self._h5 is not None:
+            out = self.data[...]; self._h5.close(); return out
+        if self.path is not None:
+            del self.data
+            return np.load(self.path, mmap_mode='r')
+        return self.data
+
+def run_scenario(scenario_name, T_val, steps=2000, dt=0.05, check_every=50, record_every=10,
+                 out_path=None, compression=None, seed=None, fft_workers=None, adaptive=False, rtol=1e-3,
+                 dt_max=None, dtype='complex128'):
+    sim = SPGPE_Propagator(L=100.0, N=64, T=T_val, dt=dt, gamma=0.1, check_every=check_every,
+                           seed=seed, fft_workers=fft_workers, dtype=dtype)
+    writer = HistoryWriter(out_path, -(-steps // record_every), sim.N, compression=compression)
+    if adaptive:
+        # Same physical time and sampling instants as the fixed-step loop (row j after step j*record_every)
+        # dt_max=None keeps the propagator default; steps are clipped at the sampling instants anyway
+        sim.rtol = rtol
+        if dt_max is not None: sim.dt_max = dt_max
+        t = 0.0
+        for j in range(writer.rows):
+            t_j = (j * record_every + 1) * dt
+            while t < t_j * (1 - 1e-12) and not sim.is_crashed:
+                t += sim.step_adaptive(t, t_max=t_j)
+            if sim.is_crashed:
+                writer.fill_nan(j)
+                break
+            writer.write(j, to_numpy(sim.get_z_profile()))
+        print(f"[{scenario_name}] adaptive: accepted={sim.n_accepted} rejected={sim.n_rejected} "
+              f"FFT pairs={sim.n_fft_pairs} (fixed dt: {steps} FFT pairs)")
+        return writer.close(), sim.calculate_signal_contrast()
+    while sim.n_steps < steps:
+        i = sim.n_steps
         sim.step(i * sim.dt)
-        if i % 10 == 0:
-            prof = sim.get_z_profile()
-            history.append(cp.asnumpy(prof) if xp == cp else prof)
+        if sim.n_steps < i: continue  # rolled back; replayed rows overwrite in place
         if sim.is_crashed:
-            for _ in range((steps - i) // 10): history.append(np.full(sim.N, np.nan))
+            writer.fill_nan(-(-i // record_every))
             break
-    return np.array(history), sim.calculate_signal_contrast()
+        if i % record_every == 0:
+            writer.write(i // record_every, to_numpy(sim.get_z_profile()))
+    return writer.close(), sim.calculate_signal_contrast()
+
+def run_ensemble(T_val, steps=2000, dt=0.05, seeds=range(16), N=64, record_every=10, check_every=50, **kwargs):
+    """Batched multi-seed version of run_scenario.
+
+    Returns per-seed z-profile histories (B, ceil(steps/record_every), N), per-seed signal
+    contrasts, and their mean and standard error."""
+    sim = SPGPE_Ensemble(seeds, L=100.0, N=N, T=T_val, dt=dt, gamma=0.1, check_every=check_every, **kwargs)
+    history = np.full((sim.B, -(-steps // record_every), N), np.nan)
+    while sim.n_steps < steps:
+        i = sim.n_steps
+        sim.step(i * sim.dt)
+        if sim.n_steps < i: continue  # rolled back; replayed rows overwrite in place
+        if i % record_every == 0: history[:, i // record_every] = to_numpy(sim.get_z_profile())
+        if sim.is_crashed: break
+    contrast = sim.calculate_signal_contrast()
+    se = float(np.std(contrast, ddof=1) / np.sqrt(sim.B)) if sim.B > 1 else float('nan')
+    return {'seeds': sim.seeds, 'history': history, 'contrast': contrast,
+            'contrast_mean': float(np.mean(contrast)), 'contrast_se': se, 'crashed': sim.crashed.copy()}
+
+def precision_report(T_val, steps=500, dt=0.05, N=64, seed=0, record_every=25, tol_norm=1e-4, tol_energy=1e-3):
+    """Runs complex64 against a complex128 reference over a fixed horizon and reports the drift.
+
+    Both runs consume the same float32 noise stream (upcast in the reference), so the deviation
+    isolates field precision. Returns max relative norm/energy/z-profile deviations and safe=True
+    when norm and energy stay within tol_norm/tol_energy."""
+    sims = {dt_: SPGPE_Propagator(L=100.0, N=N, T=T_val, dt=dt, gamma=0.1, seed=seed, dtype=dt_, noise_dtype=np.float32)
+            for dt_ in ('complex128', 'complex64')}
+    dev = {'norm': 0.0, 'energy': 0.0, 'z_profile': 0.0}
+    timing = {}
+    for i in range(steps):
+        for name, sim in sims.items():
+            t0 = time.perf_counter(); sim.step(i * dt); timing[name] = timing.get(name, 0.0) + time.perf_counter() - t0
+        ref, low = sims['complex128'], sims['complex64']
+        if ref.is_crashed or low.is_crashed: break
+        if (i + 1) % record_every == 0 or i == steps - 1:
+            for key, f in (('norm', lambda s: s.norm()), ('energy', lambda s: s.energy())):
+                r = f(ref); dev[key] = max(dev[key], abs(f(low) - r) / max(abs(r), 1e-300))
+            pr, pl = to_numpy(ref.get_z_profile()), to_numpy(low.get_z_profile())
+            dev['z_profile'] = max(dev['z_profile'], float(np.max(np.abs(pl - pr)) / np.max(np.abs(pr))))
+    crashed = {k: s.is_crashed for k, s in sims.items()}
+    return {'T': T_val, 'steps': i + 1, 'dt': dt, 'N': N, 'max_rel_norm_dev': dev['norm'],
+            'max_rel_energy_dev': dev['energy'], 'max_rel_profile_dev': dev['z_profile'], 'crashed': crashed,
+            'speedup': timing['complex128'] / timing['complex64'],
+            'safe': dev['norm'] <= tol_norm and dev['energy'] <= tol_energy and len(set(crashed.values())) == 1}
 
-# Run Data
-data_A, cont_A = run_scenario("A", 0.0534, 2000, 0.05)
-data_B, cont_B = run_scenario("B", 0.10, 10000, 0.01)
-data_B_visual = data_B[::5]
+# ==============================================================================
+# Scenario runner (process pool + result cache)
+# ==============================================================================
+SCENARIOS = {
+    'A': dict(T_val=0.0534, steps=2000, dt=0.05, seed=1),
+    'B': dict(T_val=0.10, steps=10000, dt=0.01, seed=2),
+}
+CACHE_VERSION = 1  # bump when the propagator changes in a way that invalidates cached histories
+
+def scenario_key(params):
+    blob = json.dumps({'v': CACHE_VERSION, **params}, sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+def _cache_file(cache_dir, name, params):
+    return os.path.join(cache_dir, f"scenario_{name}_{scenario_key(params)}.npz")
+
+def _run_cached(name, params, fft_workers, cache_dir):
+    history, contrast = run_scenario(name, fft_workers=fft_workers, **params)
+    history = np.asarray(history)
+    if cache_dir:
+        path = _cache_file(cache_dir, name, params)
+        tmp = path + f".tmp{os.getpid()}.npz"
+        np.savez(tmp, history=history, contrast=contrast, params=json.dumps(params, sort_keys=True))
+        os.replace(tmp, path)
+    return history, float(contrast)
+
+def load_cached(name, params, cache_dir):
+    path = _cache_file(cache_dir, name, params)
+    if not os.path.exists(path): return None
+    with np.load(path) as z:
+        return z['history'], float(z['contrast'])
+
+def run_scenarios(scenarios=SCENARIOS, cache_dir="v10_cache", workers=None, force=False, replot=False):
+    """Runs (or loads from cache) every scenario; returns {name: (history, contrast)}.
+
+    Uncached scenarios run concurrently in a process pool; each process gets an equal
+    share of the cores as its FFT thread budget. GPU runs stay in-process."""
+    if cache_dir: os.makedirs(cache_dir, exist_ok=True)
+    results, todo = {}, []
+    for name, params in scenarios.items():
+        hit = None if (force or not cache_dir) else load_cached(name, params, cache_dir)
+        if hit is not None: results[name] = hit; print(f"[cache] scenario {name}")
+        elif replot: raise FileNotFoundError(f"no cached result for scenario {name} in {cache_dir}")
+        else: todo.append(name)
+    if not todo: return results
+    n_cpu = os.cpu_count() or 1
+    procs = 1 if xp is not np else max(1, min(len(todo), workers or n_cpu))
+    fft_workers = max(1, n_cpu // procs)
+    if procs == 1:
+        for name in todo: results[name] = _run_cached(name, scenarios[name], fft_workers, cache_dir)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=procs) as ex:
+            futs = {name: ex.submit(_run_cached, name, scenarios[name], fft_workers, cache_dir) for name in todo}
+            for name, f in futs.items(): results[name] = f.result()
+    return results
 
 # ==============================================================================
 # 3. Figure 1: Energy Propagation
 # ==============================================================================
-fig1, axes = plt.subplots(1, 2, figsize=(14, 7), sharey=True)
+def plot_figure1(data_A, cont_A, data_B, cont_B, pdf_name="V10_Figure1_Propagation_v6.pdf"):
+    data_B_visual = data_B[::5]
+
+    fig1, axes = plt.subplots(1, 2, figsize=(14, 7), sharey=True)
 
-# Safe strings requested by reviewer
-left_title = f"Scenario A\nATP-scale low-noise regime\nT = 0.0534\nSignal contrast: C ≈ {cont_A:.2f}\n(more distinguishable)"
-right_title = f"Scenario B\nHigh-noise reference regime\nT = 0.10\nSignal contrast: C ≈ {cont_B:.2f}\n(low distinguishability)"
+    # Safe strings requested by reviewer
+    left_title = f"Scenario A\nATP-scale low-noise regime\nT = 0.0534\nSignal contrast: C ≈ {cont_A:.2f}\n(more distinguishable)"
+    right_title = f"Scenario B\nHigh-noise reference regime\nT = 0.10\nSignal contrast: C ≈ {cont_B:.2f}\n(low distinguishability)"
 
-im1 = axes[0].imshow(data_A, aspect='auto', origin='lower', cmap='magma', extent=[-50, 50, 0, 100])
-axes[0].set_title(left_title, fontsize=13, fontweight='bold', pad=10)
-axes[0].set_xlabel("Position $z$ (dimensionless)", fontsize=13)
-axes[0].set_ylabel("Time (dimensionless)", fontsize=13)
-axes[0].axvline(-25, color='white', linestyle='--', alpha=0.5)
-axes[0].text(-23, 95, "Input pulse", color='white', fontsize=12, bbox=dict(facecolor='black', alpha=0.5, edgecolor='none'))
+    im1 = axes[0].imshow(data_A, aspect='auto', origin='lower', cmap='magma', extent=[-50, 50, 0, 100])
+    axes[0].set_title(left_title, fontsize=13, fontweight='bold', pad=10)
+    axes[0].set_xlabel("Position $z$ (dimensionless)", fontsize=13)
+    axes[0].set_ylabel("Time (dimensionless)", fontsize=13)
+    axes[0].axvline(-25, color='white', linestyle='--', alpha=0.5)
+    axes[0].text(-23, 95, "Input pulse", color='white', fontsize=12, bbox=dict(facecolor='black', alpha=0.5, edgecolor='none'))
 
-im2 = axes[1].imshow(data_B_visual, aspect='auto', origin='lower', cmap='magma', extent=[-50, 50, 0, 100])
-axes[1].set_title(right_title, fontsize=13, fontweight='bold', pad=10)
-axes[1].set_xlabel("Position $z$ (dimensionless)", fontsize=13)
-axes[1].axvline(-25, color='white', linestyle='--', alpha=0.5)
-axes[1].set_facecolor("grey")
-axes[1].text(0, 75, "Outside validated\npre-crash window", color='white', fontsize=12, fontweight='bold', ha='center', va='center', bbox=dict(facecolor='black', alpha=0.5, edgecolor='none'))
+    im2 = axes[1].imshow(data_B_visual, aspect='auto', origin='lower', cmap='magma', extent=[-50, 50, 0, 100])
+    axes[1].set_title(right_title, fontsize=13, fontweight='bold', pad=10)
+    axes[1].set_xlabel("Position $z$ (dimensionless)", fontsize=13)
+    axes[1].axvline(-25, color='white', linestyle='--', alpha=0.5)
+    axes[1].set_facecolor("grey")
+    axes[1].text(0, 75, "Outside validated\npre-crash window", color='white', fontsize=12, fontweight='bold', ha='center', va='center', bbox=dict(facecolor='black', alpha=0.5, edgecolor='none'))
 
-cbar = fig1.colorbar(im2, ax=axes.ravel().tolist(), pad=0.02)
-cbar.set_label("Energy density $|\psi|^2$", fontsize=13)
+    cbar = fig1.colorbar(im2, ax=axes.ravel().tolist(), pad=0.02)
+    cbar.set_label("Energy density $|\psi|^2$", fontsize=13)
 
-pdf1_name = "V10_Figure1_Propagation_v6.pdf"
-plt.savefig(pdf1_name, bbox_inches='tight', format='pdf')
-plt.close(fig1)
+    plt.savefig(pdf_name, bbox_inches='tight', format='pdf')
+    plt.close(fig1)
+    return pdf_name
 
 # ==============================================================================
 # 4. Figure 2: Scaling Logic
 # ==============================================================================
-Tc = 0.0863
-T_range = np.linspace(0.0, 0.14, 500)
-m_ideal = np.zeros_like(T_range)
-mask = T_range < Tc
-m_ideal[mask] = (1 - T_range[mask]/Tc)**0.35
-m_curve = m_ideal * (1 / (1 + np.exp((T_range - Tc)/0.005))) + 0.02 * (1 / (1 + np.exp((T_range - Tc)/0.005)))
-
-fig2, ax = plt.subplots(figsize=(9, 6))
-
-# Plot Curve
-ax.plot(T_range, m_curve, color='black', linewidth=3)
-ax.fill_between(T_range, 0, m_curve, color='gray', alpha=0.1)
-
-# Tc Line
-ax.axvline(Tc, color='gray', linestyle='--', linewidth=2)
-ax.text(Tc + 0.002, 1.05, f'$T_c \\approx {Tc}$\n(Part IX estimate)', color='gray', fontsize=13, fontweight='bold', ha='left', va='top')
-
-# Points (NO LEGEND, ONLY DIRECT ANNOTATION)
-ax.scatter([0.0534], [order_parameter_model(np.array([0.0534]), Tc)[0] if 'order_parameter_model' in globals() else 0.73], color='green', s=200, zorder=10, edgecolors='black')
-ax.text(0.0534 - 0.005, 0.55, "Scenario A\nATP-scale low-noise regime\n$T_{eff} \\approx 0.0534$", fontsize=12, color='green', fontweight='bold', ha='center', va='top')
-
-ax.scatter([0.10], [0.0], color='red', s=200, zorder=10, edgecolors='black', marker='X')
-ax.text(0.10 + 0.003, 0.15, "Scenario B\nHigh-noise reference regime\n$T = 0.10$", fontsize=12, color='red', fontweight='bold', ha='left', va='bottom')
-
-# Scaling Box
-scaling_label = "Scaling logic:\n$T_{eff} = k_B T_{phys} / E_{ATP}$\n$0.0267\\ eV / 0.5\\ eV \\approx 0.0534$"
-ax.text(0.60, 0.65, scaling_label, transform=ax.transAxes, fontsize=12, verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
-
-# Labels
-ax.set_xlabel('Dimensionless temperature $T$', fontsize=14)
-ax.set_ylabel('Order parameter $m(T)$ (schematic)', fontsize=14)
-ax.set_xlim(0.0, 0.135)
-ax.set_ylim(-0.05, 1.15)
-ax.grid(True, linestyle=':', alpha=0.6)
-
-pdf2_name = "V10_Figure2_Scaling_Logic_v6.pdf"
-plt.savefig(pdf2_name, bbox_inches='tight', format='pdf')
-plt.close(fig2)
-
-print(f"✅ Generated {pdf1_name} and {pdf2_name}")
-
-try:
-    from google.colab import files
-    files.download(pdf1_name)
-    files.download(pdf2_name)
-except ImportError:
-    pass
\ No newline at end of file
+def plot_figure2(pdf_name="V10_Figure2_Scaling_Logic_v6.pdf"):
+    Tc = 0.0863
+    T_range = np.linspace(0.0, 0.14, 500)
+    m_ideal = np.zeros_like(T_range)
+    mask = T_range < Tc
+    m_ideal[mask] = (1 - T_range[mask]/Tc)**0.35
+    m_curve = m_ideal * (1 / (1 + np.exp((T_range - Tc)/0.005))) + 0.02 * (1 / (1 + np.exp((T_range - Tc)/0.005)))
+
+    fig2, ax = plt.subplots(figsize=(9, 6))
+
+    # Plot Curve
+    ax.plot(T_range, m_curve, color='black', linewidth=3)
+    ax.fill_between(T_range, 0, m_curve, color='gray', alpha=0.1)
+
+    # Tc Line
+    ax.axvline(Tc, color='gray', linestyle='--', linewidth=2)
+    ax.text(Tc + 0.002, 1.05, f'$T_c \\approx {Tc}$\n(Part IX estimate)', color='gray', fontsize=13, fontweight='bold', ha='left', va='top')
+
+    # Points (NO LEGEND, ONLY DIRECT ANNOTATION)
+    ax.scatter([0.0534], [order_parameter_model(np.array([0.0534]), Tc)[0] if 'order_parameter_model' in globals() else 0.73], color='green', s=200, zorder=10, edgecolors='black')
+    ax.text(0.0534 - 0.005, 0.55, "Scenario A\nATP-scale low-noise regime\n$T_{eff} \\approx 0.0534$", fontsize=12, color='green', fontweight='bold', ha='center', va='top')
+
+    ax.scatter([0.10], [0.0], color='red', s=200, zorder=10, edgecolors='black', marker='X')
+    ax.text(0.10 + 0.003, 0.15, "Scenario B\nHigh-noise reference regime\n$T = 0.10$", fontsize=12, color='red', fontweight='bold', ha='left', va='bottom')
+
+    # Scaling Box
+    scaling_label = "Scaling logic:\n$T_{eff} = k_B T_{phys} / E_{ATP}$\n$0.0267\\ eV / 0.5\\ eV \\approx 0.0534$"
+    ax.text(0.60, 0.65, scaling_label, transform=ax.transAxes, fontsize=12, verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
+
+    # Labels
+    ax.set_xlabel('Dimensionless temperature $T$', fontsize=14)
+    ax.set_ylabel('Order parameter $m(T)$ (schematic)', fontsize=14)
+    ax.set_xlim(0.0, 0.135)
+    ax.set_ylim(-0.05, 1.15)
+    ax.grid(True, linestyle=':', alpha=0.6)
+
+    plt.savefig(pdf_name, bbox_inches='tight', format='pdf')
+    plt.close(fig2)
+    return pdf_name
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate V10 Figures 1 and 2")
+    ap.add_argument("--workers", type=int, default=None, help="scenario processes (default: one per scenario, capped at cores)")
+    ap.add_argument("--cache_dir", default="v10_cache", help="scenario result cache ('' disables)")
+    ap.add_argument("--force", action="store_true", help="re-simulate even if cached")
+    ap.add_argument("--replot", action="store_true", help="plot from cached results only; never simulate")
+    ap.add_argument("--precision_check", type=int, default=0, metavar="STEPS",
+                    help="compare complex64 vs complex128 for each scenario over STEPS steps and exit")
+    ap.add_argument("--slab", type=int, default=0, metavar="N",
+                    help="run the MPI slab-decomposed propagator on an N^3 grid and exit (use with mpirun)")
+    ap.add_argument("--slab_steps", type=int, default=100)
+    ap.add_argument("--fft_workers", type=int, default=1, help="FFT threads per rank for --slab")
+    ap.add_argument("--slab_adaptive", action="store_true",
+                    help="use adaptive step-doubling for --slab (same physical time as --slab_steps fixed steps)")
+    ap.add_argument("--slab_rtol", type=float, default=1e-3, help="relative tolerance for --slab_adaptive")
+    args = ap.parse_args(argv)
+
+    if args.slab:
+        run_slab(N=args.slab, steps=args.slab_steps, fft_workers=args.fft_workers,
+                 adaptive=args.slab_adaptive, rtol=args.slab_rtol)
+        return
+    if args.precision_check:
+        for name, p in SCENARIOS.items():
+            rep = precision_report(p['T_val'], steps=args.precision_check, dt=p['dt'], seed=p.get('seed', 0))
+            print(f"[{name}] " + json.dumps(rep))
+        return
+
+    res = run_scenarios(SCENARIOS, cache_dir=args.cache_dir, workers=args.workers, force=args.force, replot=args.replot)
+    (data_A, cont_A), (data_B, cont_B) = res['A'], res['B']
+    pdf1_name = plot_figure1(data_A, cont_A, data_B, cont_B)
+    pdf2_name = plot_figure2()
+
+    print(f"✅ Generated {pdf1_name} and {pdf2_name}")
+
+    try:
+        from google.colab import files
+        files.download(pdf1_name)
+        files.download(pdf2_name)
+    except ImportError:
+        pass
+
+if __name__ == "__main__":
+    main()
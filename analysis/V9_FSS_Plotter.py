@@ -13,9 +13,10 @@ matplotlib.rcParams['svg.fonttype'] = 'none'    # SVGでのアウトライン化
 import matplotlib.pyplot as plt
 # ------------------------------------------------------------------------------------
 
-def perform_fss_analysis(csv_path='T_sym_table.csv', nu=0.63):
+def perform_fss_analysis(csv_path='T_sym_table.csv', nu=0.63, out_pdf="FSS_Final_Plot.pdf"):
     """
     T_sym_table.csvを読み込み、FSS解析を実行し、結果とグラフを生成する。
+    結果(Tc等)を辞書で返す。
     """
     try:
         df = pd.read_csv(csv_path)
@@ -88,9 +89,11 @@ def perform_fss_analysis(csv_path='T_sym_table.csv', nu=0.63):
     ax2.grid(True)
 
     plt.tight_layout()
-    fig.savefig("FSS_Final_Plot.pdf")
+    fig.savefig(out_pdf)
     plt.close(fig)
-    print("\nグラフを 'FSS_Final_Plot.pdf' として保存しました。")
+    print(f"\nグラフを '{out_pdf}' として保存しました。")
+    return {"nu": nu, "Tc_weighted": float(tc_w), "slope_weighted": float(a_w), "chi2_per_ndf": float(chi2_per_ndf_w),
+            "Tc_unweighted": float(tc_uw), "Tc": float(tc_final_center), "Tc_err": float(tc_final_error)}
 
 if __name__ == '__main__':
     perform_fss_analysis()
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+V9 T_sym 一括実行（複数L → T_sym_table.csv → FSS）
+
+マニフェスト(JSON/YAML)に全Lの窓・ファイル指定を書き、1回の起動で
+  1) 全Lのファイルを和集合として1つのプロセスプールで走査（系列キャッシュを共有）
+  2) L毎に c*・ΔF・T_sym(点推定＋bootstrap) を算出（--workers はLの並列数と各Lのbootstrap並列数に分配）
+  3) T_sym_table.csv を書き出し、V9_FSS_Plotter で FSS 外挿
+まで行う。
+
+マニフェスト例 (JSON):
+{
+  "data_dir": "data",
+  "regex": "T([0-9.]+)\\.csv",
+  "bundles": ["Final", "HighRes"],
+  "n_boot": 1000,
+  "sizes": [
+    {"L": 100, "globs": "*L100*.csv", "twin": [0.100, 0.104]},
+    {"L": 128, "globs": "*L128*.csv", "twin": [0.094, 0.099]},
+    {"L": 160, "globs": "*L160*.csv", "twin": [0.092, 0.096], "exclude_substr": ["r9"]}
+  ],
+  "fss": {"nu": 0.63}
+}
+sizes の各要素はトップレベルのキー(regex, bundles, exclude_substr, require_col, n_boot, boot_engine, cstar_method)を上書きできる。
+
+実行:
+  python analysis/V9_Tsym_Batch.py --manifest tsym_manifest.json --workers 8
+"""
+import os, sys, json, argparse
+from pathlib import Path
+import pandas as pd
+
+import V9_Tsym_Reconciled_Final_v8_3_resilient as tsym
+
+SIZE_KEYS = ["regex","bundles","exclude_substr","require_col","n_boot","boot_engine","cstar_method"]
+DEFAULTS = {"bundles":["Final","HighRes"], "exclude_substr":[], "require_col":"zb", "n_boot":200, "boot_engine":"vectorized",
+            "cstar_method":"legacy"}
+
+def load_manifest(path: Path) -> dict:
+    text=Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix.lower() in (".yaml",".yml"):
+        try: import yaml
+        except ImportError: raise SystemExit("YAML manifest requires PyYAML (pip install pyyaml); or use JSON.")
+        man=yaml.safe_load(text)
+    else:
+        man=json.loads(text)
+    if not man.get("sizes"): raise SystemExit("Manifest has no 'sizes'.")
+    base={k:man.get(k, DEFAULTS.get(k)) for k in SIZE_KEYS}
+    sizes=[]
+    for e in man["sizes"]:
+        cfg=dict(base); cfg.update({k:e[k] for k in SIZE_KEYS if k in e})
+        for k in ("L","globs","twin"):
+            if k not in e: raise SystemExit(f"Manifest size entry lacks '{k}': {e}")
+        cfg.update(L=int(e["L"]), globs=e["globs"], twin=[float(t) for t in e["twin"]])
+        if not cfg["regex"]: raise SystemExit(f"No regex for L={cfg['L']}.")
+        sizes.append(cfg)
+    man["sizes"]=sizes
+    return man
+
+def write_table(metas: list[dict], out_csv: Path) -> pd.DataFrame:
+    rows=[]
+    for m in metas:
+        lo,hi=m["CI_95"]
+        if m["T_sym_point"] is None or lo is None or hi is None:
+            print(f"[warn] L={m['L']}: T_sym or CI missing; excluded from table.")
+            continue
+        rows.append({"L":m["L"],"T_sym":round(m["T_sym_point"],6),"CI_low":round(lo,6),"CI_high":round(hi,6)})
+    tab=pd.DataFrame(rows, columns=["L","T_sym","CI_low","CI_high"]).sort_values("L")
+    tab.to_csv(out_csv, index=False)
+    return tab
+
+def _run_size(task) -> tuple[dict|None, str|None]:
+    """1つのLの run_tsym（parallel_map用）。レコード不足(SystemExit)は (None, 理由) で返し、残りのLは続行する。"""
+    cfg,paths,temps,stats,out_dir,workers,state_dir,cache_dir=task
+    try:
+        return tsym.run_tsym(cfg["L"], paths, temps, stats, cfg["twin"], cfg["regex"], out_dir,
+                             bundles=cfg["bundles"], exclude_substr=cfg["exclude_substr"], require_col=cfg["require_col"],
+                             n_boot=cfg["n_boot"], boot_engine=cfg["boot_engine"], workers=workers,
+                             cstar_method=cfg["cstar_method"], state_dir=state_dir, cache_dir=cache_dir), None
+    except SystemExit as e: return None, str(e)
+
+def main():
+    ap=argparse.ArgumentParser(allow_abbrev=False)
+    ap.add_argument("--manifest", required=True, help="JSON or YAML manifest of all L values")
+    ap.add_argument("--out_dir", default=None, help="output directory (default: manifest data_dir)")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--hist_bins", type=int, default=tsym.HIST_BINS)
+    ap.add_argument("--chunk_rows", type=int, default=tsym.CHUNK_ROWS)
+    ap.add_argument("--cache_dir", default=None, help="shared series cache (default: <data_dir>/.tsym_cache)")
+    ap.add_argument("--cache_max_bytes", type=int, default=tsym.CACHE_MAX_BYTES)
+    ap.add_argument("--no_cache", action="store_true")
+    ap.add_argument("--incremental", action="store_true", help="reuse persisted per-file sketches/records")
+    ap.add_argument("--state_dir", default=None, help="incremental state store (default: <data_dir>/.tsym_state)")
+    ap.add_argument("--no_fss", action="store_true", help="only write T_sym_table.csv")
+    args=ap.parse_args()
+
+    man=load_manifest(Path(args.manifest))
+    data_dir=Path(man.get("data_dir","."))
+    if not data_dir.is_absolute(): data_dir=Path(args.manifest).parent/data_dir  # マニフェスト基準の相対パス
+    out_dir=Path(args.out_dir) if args.out_dir else data_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir=None if args.no_cache else (Path(args.cache_dir) if args.cache_dir else data_dir/".tsym_cache")
+    state_dir=(Path(args.state_dir) if args.state_dir else data_dir/".tsym_state") if args.incremental else None
+
+    # 全Lのファイルを和集合で一括走査（require_col/regexが同じ組ごと）
+    per_L={cfg["L"]:tsym.collect_paths(data_dir, cfg["globs"], cfg["bundles"], cfg["exclude_substr"]) for cfg in man["sizes"]}
+    temps,stats={},{}
+    for key in sorted({(cfg["regex"],cfg["require_col"]) for cfg in man["sizes"]}, key=str):
+        union=sorted({p for cfg in man["sizes"] if (cfg["regex"],cfg["require_col"])==key for p in per_L[cfg["L"]]})
+        t,s=tsym.scan_files(union, key[0], key[1], bins=args.hist_bins, chunksize=args.chunk_rows,
+                            cache_dir=cache_dir, cache_max_bytes=args.cache_max_bytes, workers=args.workers, state_dir=state_dir)
+        temps[key]=t; stats[key]=s
+
+    # L毎の run_tsym をプロセスプールで並列化し、残りのワーカーを各Lのbootstrapに回す
+    l_workers=max(1, min(args.workers, len(man["sizes"])))
+    boot_workers=max(1, args.workers//l_workers)
+    tasks=[]
+    for cfg in man["sizes"]:
+        key=(cfg["regex"],cfg["require_col"]); paths=per_L[cfg["L"]]
+        own=[str(p) for p in paths]  # 各Lに必要な分だけワーカーへ渡す
+        tasks.append((cfg, paths, {k:temps[key][k] for k in own if k in temps[key]}, {k:stats[key][k] for k in own if k in stats[key]},
+                      out_dir, boot_workers, state_dir, cache_dir))
+    metas=[]
+    for cfg,(meta,err) in zip(man["sizes"], tsym.parallel_map(_run_size, tasks, l_workers)):
+        if meta is None: print(f"[warn] L={cfg['L']}: {err} Skipped.")
+        else: metas.append(meta)
+
+    table_csv=out_dir/"T_sym_table.csv"
+    tab=write_table(metas, table_csv)
+    print(f"Saved: {table_csv}\n{tab.to_string(index=False)}")
+    if args.no_fss: return
+    if len(tab)<3:
+        print("[FSS] skipped: at least 3 system sizes with finite T_sym and CI are required.")
+        return
+    from V9_FSS_Plotter import perform_fss_analysis
+    fss=perform_fss_analysis(str(table_csv), nu=float(man.get("fss",{}).get("nu",0.63)), out_pdf=str(out_dir/"FSS_Final_Plot.pdf"))
+    if fss is None: sys.exit(f"[FSS] fit failed: could not read {table_csv}; FSS_fit.json not written.")
+    with open(out_dir/"FSS_fit.json","w",encoding="utf-8") as f: json.dump(fss,f,ensure_ascii=False,indent=2)
+
+if __name__=="__main__":
+    os.environ.setdefault("OMP_NUM_THREADS","1"); os.environ.setdefault("MKL_NUM_THREADS","1")
+    main()
@@ -1,5 +1,8 @@
-import os, re, json, time, argparse, warnings
+import os, re, json, time, argparse, warnings, hashlib, cProfile
 from pathlib import Path
+from functools import partial
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 from sklearn.isotonic import IsotonicRegression
@@ -10,6 +13,10 @@ import matplotlib.pyplot as plt
 warnings.filterwarnings("ignore", category=FutureWarning)
 pd.set_option("display.width", 200); pd.set_option("display.max_columns", 200)
 CANDIDATE_COLS = ["zb","m","order","order_parameter","op","z_b"]
+HIST_BINS = 1<<16       # スケッチのキー数上限（ビン幅はデータ幅/HIST_BINS程度の2の冪、メモリはこれで頭打ち）
+CHUNK_ROWS = 1_000_000  # CSVチャンク行数（メモリ上限を決める）
+BOOT_BLOCK = 2000       # 一括bootstrapで同時に処理する反復数（メモリ上限）
+CACHE_MAX_BYTES = 20*1024**3  # 系列キャッシュの総容量上限（超過分は古い順に削除）
 
 def extract_T_from_name(name: str, regex: str) -> float:
     m = re.findall(regex, name)
@@ -17,48 +24,266 @@ def extract_T_from_name(name: str, regex: str) -> float:
     s = str(m[-1]).strip().rstrip(".")
     return float(s)
 
-def load_series(path: Path, require_col: str|None) -> np.ndarray|None:
-    df = pd.read_csv(path)
-    if require_col is not None:
-        if require_col not in df.columns: return None
-        x = df[require_col].to_numpy(dtype=float)
+def file_signature(path: Path, require_col: str|None, extra: str="") -> str:
+    # キー = 絶対パス + mtime + サイズ + 列名（元CSVが更新されれば自動的に別キー）
+    st=os.stat(path)
+    key=f"{Path(path).resolve()}|{st.st_mtime_ns}|{st.st_size}|{require_col or '<auto>'}{extra}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+def _cache_path(cache_dir: Path, path: Path, require_col: str|None) -> Path:
+    return Path(cache_dir)/f"{Path(path).stem}_{require_col or 'auto'}_{file_signature(path, require_col)}.npy"
+
+def _cache_get(cache_dir: Path|None, path: Path, require_col: str|None) -> np.ndarray|None:
+    if cache_dir is None: return None
+    cp=_cache_path(cache_dir, path, require_col)
+    if not cp.exists(): return None
+    try: x=np.load(cp, mmap_mode="r")
+    except (ValueError, OSError): return None
+    os.utime(cp)  # LRU用にアクセス時刻を更新
+    return x
+
+def _cache_evict(cache_dir: Path, max_bytes: int):
+    files=[]
+    for f in Path(cache_dir).glob("*.npy"):
+        try: st=f.stat(); files.append((st.st_mtime, st.st_size, f))
+        except OSError: pass  # 並列ワーカーが先に削除した場合
+    files.sort(key=lambda t:t[0])
+    total=sum(sz for _,sz,_ in files)
+    for _,sz,f in files:
+        if total<=max_bytes: break
+        total-=sz
+        try: f.unlink()
+        except OSError: pass
+
+def _cache_put_raw(cache_dir: Path, path: Path, require_col: str|None, raw: Path, n: int, max_bytes: int=CACHE_MAX_BYTES):
+    # チャンク追記した生float64を.npyへ詰め替える（ストリーミング書き込み用）
+    cp=_cache_path(cache_dir, path, require_col); tmp=cp.with_suffix(".npy.tmp")
+    src=np.memmap(raw, dtype=float, mode="r", shape=(n,)) if n>0 else np.empty(0)
+    dst=np.lib.format.open_memmap(tmp, mode="w+", dtype=float, shape=(n,))
+    for i in range(0, n, CHUNK_ROWS): dst[i:i+CHUNK_ROWS]=src[i:i+CHUNK_ROWS]
+    dst.flush(); del dst, src
+    os.replace(tmp, cp); raw.unlink()
+    _cache_evict(cache_dir, max_bytes)
+
+def is_binary_series(path: Path) -> bool:
+    # simulation.py のバイナリ出力: (rows, ncols) float64 の .npy + 列名を持つ JSON サイドカー <path>.json
+    return Path(path).suffix==".npy" and Path(str(path)+".json").exists()
+
+def open_binary_series(path: Path) -> tuple[np.ndarray, list[str]]:
+    with open(str(path)+".json") as f: cols=json.load(f)["columns"]
+    # 行数はヘッダから読む（0行のファイルはメモリマップできない）
+    with open(path,"rb") as f:
+        ver=np.lib.format.read_magic(f)
+        shape=(np.lib.format.read_array_header_1_0 if ver==(1,0) else np.lib.format.read_array_header_2_0)(f)[0]
+    x=np.load(path, mmap_mode="r") if shape[0]>0 else np.empty((0,len(cols)))
+    return x, cols
+
+def _binary_pick(x: np.ndarray, names: list[str], require_col: str|None) -> str|None:
+    if require_col is not None: return require_col if require_col in names else None
+    for c in CANDIDATE_COLS:
+        if c in names: return c
+    if not names or x.shape[0]==0: return None
+    return names[int(np.nanargmax(np.nanvar(np.asarray(x, dtype=float), axis=0)))]
+
+def _pick_columns(path: Path, require_col: str|None) -> list[str]:
+    cols=open_binary_series(path)[1] if is_binary_series(path) else list(pd.read_csv(path, nrows=0).columns)
+    if require_col is not None: return [require_col] if require_col in cols else []
+    for c in CANDIDATE_COLS:
+        if c in cols: return [c]
+    return cols  # 候補列なし：数値列の分散最大を後段で選ぶ
+
+def _sketch_merge(keys, counts, k_new, c_new):
+    if keys is None: return k_new, c_new
+    k_all=np.concatenate([keys,k_new]); c_all=np.concatenate([counts,c_new])
+    uk,inv=np.unique(k_all, return_inverse=True)
+    return uk, np.bincount(inv, weights=c_all, minlength=uk.size).astype(np.int64)
+
+def _sketch_coarsen(st, res):
+    # 幅を res（現在幅の2の冪倍）へ粗くする：右閉ビン k は新ビン floor(k/f) に丸ごと含まれるので計数は厳密
+    f=res/st["res"]  # 2の冪：|k|<=2^53 なので浮動小数の割り算・floorも厳密
+    if f>1 and st["keys"] is not None:
+        uk,inv=np.unique(np.floor(st["keys"]/f).astype(np.int64), return_inverse=True)
+        st["keys"],st["counts"]=uk, np.bincount(inv, weights=st["counts"], minlength=uk.size).astype(np.int64)
+    st["res"]=float(res)
+    return st
+
+def _stats_update(st, x):
+    # ビン k は区間 (k*res, (k+1)*res]（右閉）→ c*を格子点に置けば左右カウントは厳密
+    # res は最初のチャンクの頑健な値幅(1–99%点)/bins を2の冪に切り上げた値（x/res が丸め誤差なしで割り切れる）。
+    # キー数が bins を超えたら幅を倍にして隣接ビンを併合する（データの単位・範囲に依らずキー数は bins 以下）
+    x=x[np.isfinite(x)]
+    if x.size==0: return st
+    if st["res"] is None:
+        q1,q99=np.percentile(x,[1,99])
+        spread=float(q99-q1) or float(np.max(x)-np.min(x)) or float(np.max(np.abs(x))) or 1.0
+        st["res"]=float(2.0**np.ceil(np.log2(spread/st["bins"])))
+    big=float(np.max(np.abs(x)))/2.0**53  # キーがint64・float64で厳密に表せる範囲に収める
+    if big>st["res"]: _sketch_coarsen(st, float(2.0**np.ceil(np.log2(big))))
+    k=(np.ceil(x/st["res"])-1).astype(np.int64)
+    uk,c=np.unique(k, return_counts=True)
+    st["keys"],st["counts"]=_sketch_merge(st["keys"], st["counts"], uk, c.astype(np.int64))
+    while st["keys"].size>st["bins"]: _sketch_coarsen(st, 2*st["res"])
+    st["n"]+=int(x.size); st["sum"]+=float(np.sum(x)); st["sumsq"]+=float(np.sum(x*x))
+    return st
+
+def _empty_stats(path, col, bins):
+    return {"path":str(path),"col":col,"bins":int(bins),"res":None,"n":0,"sum":0.0,"sumsq":0.0,"keys":None,"counts":None,
+            "rows_parsed":0,"bytes_read":0}
+
+def scan_series(path: Path, require_col: str|None, bins: int=HIST_BINS, chunksize: int=CHUNK_ROWS,
+                cache_dir: Path|None=None, cache_max_bytes: int=CACHE_MAX_BYTES) -> dict|None:
+    """1回のチャンク読みで、1ファイル分の十分統計量(n, 和, 量子化ヒストグラム)を作る。"""
+    if is_binary_series(path):
+        arr,names=open_binary_series(path); col=_binary_pick(arr, names, require_col)
+        if col is None: return None
+        st=_empty_stats(path, col, bins); j=names.index(col)
+        for i in range(0, arr.shape[0], chunksize): _stats_update(st, np.asarray(arr[i:i+chunksize, j], dtype=float))
+        st["rows_parsed"]=int(arr.shape[0]); st["bytes_read"]=int(arr.shape[0])*8
+        return st if st["n"]>0 else None
+    x=_cache_get(cache_dir, path, require_col)
+    if x is not None:  # キャッシュは単一列のときだけ作られる
+        st=_empty_stats(path, require_col if require_col is not None else _pick_columns(path, None)[0], bins)
+        for i in range(0, x.size, chunksize): _stats_update(st, np.asarray(x[i:i+chunksize]))
+        st["bytes_read"]=int(x.nbytes)
+        return st if st["n"]>0 else None
+    cols=_pick_columns(path, require_col)
+    if not cols: return None
+    sts={c:_empty_stats(path,c,bins) for c in cols}
+    # 単一列のときだけ有限値をキャッシュへストリーム書き出し
+    raw=None
+    if cache_dir is not None and len(cols)==1:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        raw=_cache_path(cache_dir, path, require_col).with_suffix(".raw.tmp"); fraw=open(raw,"wb")
+    try:
+        rows=0
+        for chunk in pd.read_csv(path, usecols=cols, chunksize=chunksize):
+            rows+=len(chunk)
+            for c in cols:
+                if require_col is None and len(cols)>1 and not pd.api.types.is_numeric_dtype(chunk[c]):
+                    sts.pop(c,None); continue
+                if c in sts:
+                    v=chunk[c].to_numpy(dtype=float); _stats_update(sts[c], v)
+                    if raw is not None: v[np.isfinite(v)].tofile(fraw)
+            cols=[c for c in cols if c in sts]
+    finally:
+        if raw is not None: fraw.close()
+    if raw is not None:
+        n=next(iter(sts.values()))["n"] if sts else 0
+        _cache_put_raw(cache_dir, path, require_col, raw, n, cache_max_bytes)
+    sts={c:st for c,st in sts.items() if st["n"]>0}
+    if not sts: return None
+    for st in sts.values(): st["rows_parsed"]=rows; st["bytes_read"]=int(os.path.getsize(path))
+    if len(sts)==1: return next(iter(sts.values()))
+    def var(st): return st["sumsq"]/st["n"]-(st["sum"]/st["n"])**2
+    return max(sts.values(), key=var)
+
+def iter_series(path: Path, col: str, require_col: str|None, chunksize: int=CHUNK_ROWS, cache_dir: Path|None=None):
+    """scan_series が選んだ列 col の有限値をチャンクごとに返す（scan_seriesのキャッシュ→バイナリ→CSVの順）。"""
+    x=_cache_get(cache_dir, path, require_col)
+    if x is not None:
+        for i in range(0, x.size, chunksize): yield np.asarray(x[i:i+chunksize])
+        return
+    if is_binary_series(path):
+        arr,names=open_binary_series(path); j=names.index(col)
+        chunks=(arr[i:i+chunksize, j] for i in range(0, arr.shape[0], chunksize))
     else:
-        col = None
-        for c in CANDIDATE_COLS:
-            if c in df.columns: col=c; break
-        if col is None:
-            num = df.select_dtypes(include=[np.number])
-            if num.shape[1]==0: return None
-            col = num.var().sort_values(ascending=False).index[0]
-        x = df[col].to_numpy(dtype=float)
-    x = x[np.isfinite(x)]
-    return x if x.size>0 else None
-
-def per_file_deltaF(path: Path, T: float, cstar: float, require_col: str|None):
-    x = load_series(path, require_col)
-    if x is None: return None
-    m_mean = float(np.mean(x))
+        chunks=(c[col] for c in pd.read_csv(path, usecols=[col], chunksize=chunksize))
+    for v in chunks:
+        v=np.asarray(v, dtype=float); yield v[np.isfinite(v)]
+
+def load_series(st: dict, require_col: str|None, cache_dir: Path|None=None) -> np.ndarray:
+    """走査済みスケッチ st と同じ列の有限値を1本の配列で返す。"""
+    xs=list(iter_series(Path(st["path"]), st["col"], require_col, cache_dir=cache_dir))
+    return np.concatenate(xs) if xs else np.empty(0)
+
+def _state_path(state_dir: Path, path: Path) -> Path:
+    h=hashlib.sha1(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:20]
+    return Path(state_dir)/"sketches"/f"{Path(path).stem}_{h}.npz"
+
+def load_stats(state_dir: Path, path: Path, require_col: str|None, bins: int):
+    """状態ストアからスケッチを読む。戻り値 (hit, stats)。未登録/変更済みファイルは hit=False。"""
+    sp=_state_path(state_dir, path)
+    if not sp.exists(): return False, None
+    try:
+        with np.load(sp, allow_pickle=False) as z:
+            if str(z["sig"])!=file_signature(path, require_col) or int(z["bins"])!=int(bins): return False, None
+            if int(z["n"])==0: return True, None
+            st=_empty_stats(path, str(z["col"]), bins)
+            st.update(res=float(z["res"]), n=int(z["n"]), sum=float(z["sum"]), sumsq=float(z["sumsq"]), keys=z["keys"], counts=z["counts"])
+            return True, st
+    except (ValueError, OSError, KeyError): return False, None
+
+def save_stats(state_dir: Path, path: Path, require_col: str|None, bins: int, st: dict|None):
+    sp=_state_path(state_dir, path); sp.parent.mkdir(parents=True, exist_ok=True)
+    tmp=sp.with_suffix(".tmp.npz"); sig=file_signature(path, require_col)
+    if st is None: np.savez(tmp, sig=sig, bins=bins, n=0)
+    else: np.savez(tmp, sig=sig, bins=bins, res=st["res"], col=str(st["col"]), n=st["n"], sum=st["sum"], sumsq=st["sumsq"], keys=st["keys"], counts=st["counts"])
+    os.replace(tmp, sp)
+
+def scan_or_load(path: Path, require_col: str|None, bins: int=HIST_BINS, state_dir: Path|None=None, **kw) -> tuple[dict|None, bool]:
+    """状態ストアにあればスケッチを再利用し、なければ走査して保存する。戻り値 (stats, 新規走査したか)。"""
+    if state_dir is not None:
+        hit,st=load_stats(state_dir, path, require_col, bins)
+        if hit: return st, False
+    st=scan_series(path, require_col, bins=bins, **kw)
+    if state_dir is not None: save_stats(state_dir, path, require_col, bins, st)
+    return st, True
+
+def merge_stats(sts: list[dict]) -> dict|None:
+    sts=[st for st in sts if st is not None and st["n"]>0]
+    if not sts: return None
+    # 幅はいずれも2の冪なので、最も粗い幅へ厳密に揃えてから併合する
+    out=_empty_stats("<merged>", sts[0]["col"], max(st["bins"] for st in sts))
+    out["res"]=max(st["res"] for st in sts)
+    for st in sts:
+        k=_sketch_coarsen({"res":st["res"],"keys":st["keys"],"counts":st["counts"]}, out["res"])
+        out["keys"],out["counts"]=_sketch_merge(out["keys"], out["counts"], k["keys"], k["counts"])
+        out["n"]+=st["n"]; out["sum"]+=st["sum"]; out["sumsq"]+=st["sumsq"]
+    while out["keys"].size>out["bins"]: _sketch_coarsen(out, 2*out["res"])
+    return out
+
+def on_grid(st: dict, cstar: float) -> bool:
+    return float(np.round(cstar/st["res"])*st["res"])==cstar
+
+def count_left(st: dict, cstar: float) -> int:
+    # x <= c* の個数（c*が格子点 k*res 上なら厳密）
+    kc=int(np.round(cstar/st["res"]))
+    return int(st["counts"][st["keys"]<kc].sum())
+
+def count_left_exact(st: dict, cstar: float, require_col: str|None, cache_dir: Path|None=None) -> int:
+    # 格子外のc*（legacy法）：生値を1パス読み直して厳密に数える
+    chunks=iter_series(Path(st["path"]), st["col"], require_col, cache_dir=cache_dir)
+    return int(sum(np.count_nonzero(v<=cstar) for v in chunks))
+
+def deltaF_from_stats(st: dict, T: float, cstar: float, n_left: int|None=None):
+    if st is None or st["n"]==0: return None
+    m_mean = st["sum"]/st["n"]
     sign_rule = np.sign(m_mean - cstar) if np.isfinite(m_mean) else 1.0
-    L = np.count_nonzero(x <= cstar); R = np.count_nonzero(x > cstar); n = int(L+R)
+    L = count_left(st, cstar) if n_left is None else n_left; R = st["n"]-L; n = int(L+R)
     if n==0: return None
     eps = 0.5
     p_plus = (R+eps)/(n+2*eps); p_minus = (L+eps)/(n+2*eps)
     dF_abs = float(T*np.log(max(p_plus,p_minus)/min(p_plus,p_minus)))
     dF = float(sign_rule*dF_abs)
     se = float(1.25*T/max(np.sqrt(n),1.0))
-    return {"path":str(path),"T":float(T),"n":n,"DeltaF_signed":dF,"se":se}
+    return {"path":st["path"],"T":float(T),"n":n,"DeltaF_signed":dF,"se":se,"n_left":int(L),"n_right":int(R)}
+
+def group_weighted_stats(start: np.ndarray, w: np.ndarray, x: np.ndarray, with_se: bool=True):
+    """キーでソート済みの最終軸を、群の先頭位置 start ごとに逆分散重み付き平均へ縮約する（(…, n) → (…, m)）。
+    with_se=True なら残差スケール(下限1)を掛けた平均のSEも返す。"""
+    sw=np.add.reduceat(w, start, axis=-1)
+    mu=np.add.reduceat(w*x, start, axis=-1)/sw
+    if not with_se: return mu, None
+    cnt=np.diff(np.append(start, x.shape[-1]))
+    resid2=np.add.reduceat(w*(x-np.repeat(mu, cnt, axis=-1))**2, start, axis=-1)/np.maximum(cnt-1,1)
+    return mu, np.sqrt(1.0/sw)*np.maximum(1.0, np.sqrt(resid2))
 
 def aggregate_by_T(df: pd.DataFrame) -> pd.DataFrame:
-    out=[]
-    for T,g in df.groupby("T"):
-        w = 1.0/np.maximum(g["se"].to_numpy(),1e-12)**2
-        x = g["DeltaF_signed"].to_numpy()
-        mu = float(np.sum(w*x)/np.sum(w))
-        resid2 = np.sum(w*(x-mu)**2)/max(len(g)-1,1)
-        scale = max(1.0, float(np.sqrt(resid2)))
-        se_mu = float(np.sqrt(1.0/np.sum(w))*scale)
-        out.append({"T":float(T),"DeltaF":mu,"SE":se_mu,"n_files":int(len(g))})
-    d=pd.DataFrame(out).sort_values("T").reset_index(drop=True)
+    d=df.sort_values("T", kind="stable")
+    Tu,start,cnt=np.unique(d["T"].to_numpy(), return_index=True, return_counts=True)
+    w=1.0/np.maximum(d["se"].to_numpy(),1e-12)**2
+    mu,se_mu=group_weighted_stats(start, w, d["DeltaF_signed"].to_numpy())
+    d=pd.DataFrame({"T":Tu.astype(float),"DeltaF":mu,"SE":se_mu,"n_files":cnt.astype(int)})
     # SEフロア：複数ファイル点のSE中央値を単独点に適用
     if (d["n_files"]>=2).any():
         se_floor = np.nanmedian(d.loc[d["n_files"]>=2,"SE"])
@@ -67,13 +292,7 @@ def aggregate_by_T(df: pd.DataFrame) -> pd.DataFrame:
     return d
 
 def find_zero_linear(Tv, Fv):
-    s=np.sign(Fv)
-    for i in range(len(Tv)-1):
-        if s[i]==0: return float(Tv[i])
-        if s[i]*s[i+1]<0:
-            t0,t1=Tv[i],Tv[i+1]; f0,f1=Fv[i],Fv[i+1]
-            return float(t0 + (0-f0)*(t1-t0)/(f1-f0+1e-20))
-    return np.nan
+    return float(find_zero_linear_rows(np.asarray(Tv, dtype=float), np.asarray(Fv, dtype=float)[None,:])[0])
 
 def isotonic_zero_auto(Ti, Fi):
     # 方向はSSEの小さい方（increasing True/False）を採用
@@ -88,29 +307,137 @@ def isotonic_zero_auto(Ti, Fi):
     _, z, Fi_fit, inc = best
     return z, Fi_fit, inc
 
-def reopt_cstar(paths: list[Path], regex: str, require_col: str|None, top_k:int=3):
+def isotonic_fit_rows(Y: np.ndarray, increasing: bool=True) -> np.ndarray:
+    """行ごとの等重み単調回帰を一括計算する（min-max公式、PAVと同じ解）。Y: (B, m)"""
+    if not increasing: return -isotonic_fit_rows(-Y, True)
+    B,m=Y.shape
+    C=np.concatenate([np.zeros((B,1)),np.cumsum(Y,axis=1)],axis=1)
+    j=np.arange(m)[:,None]; k=np.arange(m)[None,:]
+    M=(C[:,None,1:]-C[:,:m,None])/np.maximum(k-j+1,1)  # M[b,j,k] = mean(Y[b,j..k])
+    M=np.where(k>=j, M, np.inf)
+    Cmin=np.minimum.accumulate(M[:,:,::-1],axis=2)[:,:,::-1]  # min_{k>=i} M[b,j,k]
+    return np.where(k>=j, Cmin, -np.inf).max(axis=1)  # max_{j<=i}
+
+def find_zero_linear_rows(Tv: np.ndarray, F: np.ndarray) -> np.ndarray:
+    """find_zero_linear を行ごとに一括適用する。F: (B, m)"""
+    if F.shape[1]<2: return np.full(F.shape[0], np.nan)
+    s=np.sign(F); r=np.arange(F.shape[0])
+    zero=(s[:,:-1]==0); hit=zero|(s[:,:-1]*s[:,1:]<0)
+    i=hit.argmax(axis=1)
+    t0,t1=Tv[i],Tv[i+1]; f0,f1=F[r,i],F[r,i+1]
+    z=np.where(zero[r,i], t0, t0 + (0-f0)*(t1-t0)/(f1-f0+1e-20))
+    return np.where(hit.any(axis=1), z, np.nan)
+
+def isotonic_zero_rows(Tv: np.ndarray, F: np.ndarray) -> np.ndarray:
+    # isotonic_zero_auto＋bracket_linearフォールバックの一括版（SSE同値ならincreasing優先）
+    fit_i=isotonic_fit_rows(F, True); fit_d=isotonic_fit_rows(F, False)
+    inc=np.sum((fit_i-F)**2,axis=1) <= np.sum((fit_d-F)**2,axis=1)
+    z=np.where(inc, find_zero_linear_rows(Tv, fit_i), find_zero_linear_rows(Tv, fit_d))
+    return np.where(np.isfinite(z), z, find_zero_linear_rows(Tv, F))
+
+def bootstrap_tsym_loop(df: pd.DataFrame, T_lo: float, T_hi: float, n_boot: int, seed: int=123) -> np.ndarray:
+    # 旧来の逐次bootstrap（v9公開値の再現用）
+    rng=np.random.RandomState(seed); groups={T:g.index.to_numpy() for T,g in df.groupby("T")}
+    T_sorted=np.array(sorted([t for t in groups.keys() if (t>=T_lo and t<=T_hi)]))
+    boots=[]
+    for b in range(n_boot):
+        rows=[]
+        for T in T_sorted:
+            idx=groups[T]; take=rng.choice(idx, size=len(idx), replace=True)
+            g=df.loc[take]; w=1.0/np.maximum(g["se"].to_numpy(),1e-12)**2
+            mu=float(np.sum(w*g["DeltaF_signed"])/np.sum(w))
+            rows.append((float(T),mu))
+        rows.sort(key=lambda t:t[0]); Tb=np.array([t for t,_ in rows]); Fb=np.array([f for _,f in rows])
+        if len(Tb)<2: continue
+        if not (np.nanmin(Fb) < 0 < np.nanmax(Fb)): continue
+
+        # bootstrapでもフォールバックを適用
+        zb_iso,_,_ = isotonic_zero_auto(Tb, Fb)
+        zb = zb_iso
+        if not np.isfinite(zb):
+            zb = find_zero_linear(Tb, Fb)
+
+        if np.isfinite(zb): boots.append(zb)
+    return np.array(boots)
+
+def parallel_map(fn, items: list, workers: int=1) -> list:
+    """入力順を保ったmap。workers<=1なら直列（結果はワーカー数に依存しない）。"""
+    if workers<=1 or len(items)<=1: return [fn(it) for it in items]
+    with ProcessPoolExecutor(max_workers=min(workers, len(items))) as ex:
+        return list(ex.map(fn, items))
+
+def _boot_block(task) -> np.ndarray:
+    Tu,start,col_off,col_n,w,x,nb,seq=task
+    rng=np.random.Generator(np.random.PCG64(seq))
+    idx=col_off + rng.integers(0, col_n, size=(nb, col_n.size))
+    Fb,_=group_weighted_stats(start, w[idx], x[idx], with_se=False)
+    Fb=Fb[(np.nanmin(Fb,axis=1)<0)&(np.nanmax(Fb,axis=1)>0)]  # 符号反転標本のみ
+    if Fb.shape[0]==0: return np.array([])
+    z=isotonic_zero_rows(Tu, Fb)
+    return z[np.isfinite(z)]
+
+def bootstrap_tsym(df: pd.DataFrame, T_lo: float, T_hi: float, n_boot: int, seed: int=123,
+                   block: int=BOOT_BLOCK, workers: int=1) -> np.ndarray:
+    """一括bootstrap：再標本化インデックスを(反復×ファイル)の整数行列で引き、重み付き平均・単調回帰・零点を配列演算で求める。
+    反復はblock単位に分割し、各ブロックにSeedSequenceから派生した独立乱数列を割り当てるため、結果はworkersに依らず同一。"""
+    d=df[(df["T"]>=T_lo)&(df["T"]<=T_hi)].sort_values("T", kind="stable")
+    Tu,start,cnt=np.unique(d["T"].to_numpy(), return_index=True, return_counts=True)
+    if len(Tu)<2 or n_boot<=0: return np.array([])
+    w=1.0/np.maximum(d["se"].to_numpy(),1e-12)**2; x=d["DeltaF_signed"].to_numpy()
+    col_off=np.repeat(start,cnt); col_n=np.repeat(cnt,cnt)
+    sizes=[min(block, n_boot-b0) for b0 in range(0, n_boot, block)]
+    seqs=np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks=[(Tu,start,col_off,col_n,w,x,nb,sq) for nb,sq in zip(sizes,seqs)]
+    boots=parallel_map(_boot_block, tasks, workers)
+    return np.concatenate(boots) if boots else np.array([])
+
+def select_top_T(paths: list[Path], regex: str, top_k:int=3) -> list[tuple[Path,float]]:
     Ts=[]
     for p in paths:
         try: T=extract_T_from_name(p.name, regex); Ts.append((T,p))
         except: pass
-    if not Ts: return 0.0
+    if not Ts: return []
     Ts=sorted(Ts, key=lambda t:t[0])
     # 上位温度のユニークTからtop_k選抜
     uniqT=sorted({t for t,_ in Ts})[-top_k:]
-    sel=[(p,T) for T,p in Ts if T in uniqT]
+    return [(p,T) for T,p in Ts if T in uniqT]
+
+def cstar_median(pooled: dict) -> tuple[float, dict]:
+    """J(c)=log(R/L)^2 の格子上厳密最小化（=プール標本の中央値）。
+    スケッチは右閉ビン(k*res,(k+1)*res]の計数なので、格子点cでの左右カウントは厳密。
+    返す info には真の標本中央値を含む区間(median_bracket)と c* での左右不均衡を記録する。"""
+    keys,cnt,res=pooled["keys"],pooled["counts"],pooled["res"]; n=int(cnt.sum())
+    cum=np.cumsum(cnt)
+    ok=np.flatnonzero(cum<n)  # 右側が空になる最後の辺は除外
+    if ok.size==0: return float((keys[0]+1)*res), {"method":"sketch_median","res":res,"n_pooled":n,"degenerate":True}
+    i=ok[np.argmin(np.abs(2*cum[ok]-n))]
+    # 空ビンが続く平坦区間では中点の格子点を取る
+    kc=(int(keys[i])+1+int(keys[i+1]))//2
+    cstar=float(kc*res)
+    r1,r2=(n+1)//2, n//2+1  # 中央値を与える順位（1始まり）
+    b1,b2=np.searchsorted(cum,[r1,r2])
+    L=int(cum[i])
+    info={"method":"sketch_median","res":float(res),"n_pooled":n,
+          "median_bracket":[float(keys[b1]*res), float((keys[b2]+1)*res)],
+          "n_left":L,"n_right":n-L,"rank_imbalance":float(abs(2*L-n)/n)}
+    return cstar, info
+
+def cstar_legacy(sts: list[dict], require_col: str|None, cache_dir: Path|None=None) -> tuple[float, dict]:
+    """v9公開版の手順そのまま：生値の0.5–99.5%点で張った2048ビンヒストグラム＋257点格子＋minimize_scalar。
+    範囲は各系列を(約100万行超なら)20行おきに間引いて求め、ヒストグラムは全値をチャンクごとに積算する。"""
     xs=[]
-    for p,T in sel:
-        x=load_series(p, require_col)
-        if x is not None: xs.append(x[::20] if x.size//20>50000 else x)
-    if not xs: return 0.0
-    x_all=np.concatenate(xs); lo,hi=np.percentile(x_all,[0.5,99.5])
+    for st in sts:
+        x=load_series(st, require_col, cache_dir)
+        xs.append(x[::20] if x.size//20>50000 else x)
+    lo,hi=np.percentile(np.concatenate(xs),[0.5,99.5]); del xs
+    info={"method":"legacy_hist2048","n_pooled":int(sum(st["n"] for st in sts)),"range":[float(lo),float(hi)]}
+    if not hi>lo: return float(lo), info
     bins=2048; edges=np.linspace(lo,hi,bins+1)
     H=0
-    for p,T in sel:
-        x=load_series(p, require_col)
-        if x is None: continue
-        h,_=np.histogram(x,bins=edges); H=H+h
-    if H.sum()==0: return 0.0
+    for st in sts:
+        for v in iter_series(Path(st["path"]), st["col"], require_col, cache_dir=cache_dir):
+            h,_=np.histogram(v,bins=edges); H=H+h
+    if H.sum()==0: return 0.0, info
     F=np.cumsum(H)/H.sum()
     def J(c):
         pos=(c-lo)/(hi-lo)*(bins-1); idx=int(np.clip(np.round(pos),0,bins-1))
@@ -120,7 +447,25 @@ def reopt_cstar(paths: list[Path], regex: str, require_col: str|None, top_k:int=
     grid=np.linspace(lo,hi,257); vals=np.array([J(c) for c in grid])
     j=int(np.argmin(vals)); a,b=grid[max(0,j-1)], grid[min(len(grid)-1,j+1)]
     res=optimize.minimize_scalar(J,bounds=(a,b),method="bounded",options={"xatol":1e-9})
-    return float(res.x)
+    return float(res.x), info
+
+def reopt_cstar_from_stats(sts: list[dict], method: str="legacy", info: dict|None=None,
+                           require_col: str|None=None, cache_dir: Path|None=None) -> float:
+    sts=[st for st in sts if st is not None and st["n"]>0]
+    if not sts: return 0.0
+    # median はスケッチのみ、legacy は生値を再読込する（scan_seriesのキャッシュがあればそこから）
+    cstar,sk=cstar_median(merge_stats(sts)) if method=="median" else cstar_legacy(sts, require_col, cache_dir)
+    if info is not None: info.update(sk)
+    return cstar
+
+def reopt_cstar(paths: list[Path], regex: str, require_col: str|None, top_k:int=3, stats: dict|None=None, cache_dir: Path|None=None,
+                method: str="legacy", info: dict|None=None):
+    sel=select_top_T(paths, regex, top_k)
+    if not sel: return 0.0
+    stats={} if stats is None else stats
+    for p,T in sel:
+        if str(p) not in stats: stats[str(p)]=scan_series(p, require_col, cache_dir=cache_dir)
+    return reopt_cstar_from_stats([stats[str(p)] for p,_ in sel], method=method, info=info, require_col=require_col, cache_dir=cache_dir)
 
 def plot_monotone(L, T_all, F_all, T_win, F_fit, z, out_pdf, note):
     plt.figure(figsize=(6,4), dpi=150)
@@ -132,55 +477,121 @@ def plot_monotone(L, T_all, F_all, T_win, F_fit, z, out_pdf, note):
     plt.xlabel("T"); plt.ylabel("ΔF (signed)"); plt.title(f"L={L}: ΔF vs T (FH policy)")
     plt.legend(loc="best", fontsize=9); plt.tight_layout(); plt.savefig(out_pdf); plt.close()
 
-def main():
-    ap=argparse.ArgumentParser(allow_abbrev=False)
-    ap.add_argument("--data_dir", required=True)
-    ap.add_argument("--globs", required=True, help='semicolon-separated patterns')
-    ap.add_argument("--regex", required=True)
-    ap.add_argument("--L", required=True, type=int)
-    ap.add_argument("--bundles", nargs="+", default=["Final","HighRes"])
-    ap.add_argument("--exclude_substr", nargs="*", default=[])
-    ap.add_argument("--require_col", default="zb")  # 強制
-    ap.add_argument("--twin", nargs=2, required=True, type=float)
-    ap.add_argument("--n_boot", type=int, default=200)
-    # n_jobsは意図的に削除し、常に直列実行とする
-    args=ap.parse_args()
+def peak_rss_mb() -> float|None:
+    try: import resource
+    except ImportError: return None  # Windows
+    scale=1.0 if os.uname().sysname=="Darwin" else 1024.0  # ru_maxrss: Linux=KiB, macOS=bytes
+    r=max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return float(r*scale/1024**2)
 
-    data_dir=Path(args.data_dir)
-    patterns=[p for p in args.globs.split(";") if p.strip()]
+class StageProfile:
+    """--profile 用：段ごとの壁時計時間、読み込みバイト数・行数、ピークRSSを記録する。"""
+    def __init__(self):
+        self.stages={}; self.files_read=0; self.bytes_read=0; self.rows_parsed=0
+
+    @contextmanager
+    def stage(self, name: str):
+        t0=time.perf_counter()
+        try: yield
+        finally: self.stages[name]=self.stages.get(name,0.0)+time.perf_counter()-t0
+
+    def add_io(self, stats):
+        for st in stats:
+            if st is None or st.get("bytes_read",0)==0: continue
+            self.files_read+=1; self.bytes_read+=int(st["bytes_read"]); self.rows_parsed+=int(st.get("rows_parsed",0))
+
+    def as_dict(self) -> dict:
+        return {"stage_seconds":{k:round(v,4) for k,v in self.stages.items()},
+                "total_seconds":round(sum(self.stages.values()),4),
+                "files_read":self.files_read,"bytes_read":self.bytes_read,"rows_parsed":self.rows_parsed,
+                "peak_rss_mb":peak_rss_mb()}
+
+def _stage(prof: StageProfile|None, name: str):
+    return prof.stage(name) if prof is not None else nullcontext()
+
+def collect_paths(data_dir: Path, globs: str, bundles: list[str], exclude_substr: list[str]) -> list[Path]:
+    patterns=[p for p in globs.split(";") if p.strip()]
     paths=[]
-    for pat in patterns: paths+=list(data_dir.glob(pat.strip()))
+    for pat in patterns: paths+=list(Path(data_dir).glob(pat.strip()))
     if not paths: raise SystemExit("No files matched.")
-    # 束フィルタ
-    keep=[]
-    for p in paths:
-        name=p.name
-        if args.bundles and not any(b in name for b in args.bundles): continue
-        if args.exclude_substr and any(x in name for x in args.exclude_substr): continue
-        keep.append(p)
-    paths=sorted(keep)
+    paths=sorted(filter_paths(paths, bundles, exclude_substr))
     if not paths: raise SystemExit("No files after filters.")
+    return paths
 
-    # c*再最適化（高温上位K点から）
-    cstar=reopt_cstar(paths, args.regex, args.require_col, top_k=4)
-    print(f"[c* reopt] L={args.L}, c*={cstar:.9g}, files={len(paths)}")
+def scan_files(paths: list[Path], regex: str, require_col: str|None, bins: int=HIST_BINS, chunksize: int=CHUNK_ROWS,
+               cache_dir: Path|None=None, cache_max_bytes: int=CACHE_MAX_BYTES, workers: int=1, state_dir: Path|None=None):
+    """単一パス取り込み：各ファイルを1回だけチャンク読みし、温度(ファイル名由来)と十分統計量を返す。
+    state_dir を与えると増分モード：状態ストアに同一シグネチャのスケッチがあるファイルは読まない。"""
+    temps={}
+    for p in paths:
+        try: temps[str(p)]=extract_T_from_name(p.name, regex)
+        except Exception as e: print(f"[skip] {p.name}: {e}")
+    scan=partial(scan_or_load, require_col=require_col, bins=bins, state_dir=state_dir, chunksize=chunksize,
+                 cache_dir=cache_dir, cache_max_bytes=cache_max_bytes)
+    todo=[p for p in paths if str(p) in temps]
+    out=parallel_map(scan, todo, workers)
+    stats=dict(zip([str(p) for p in todo], [st for st,_ in out]))
+    if state_dir is not None:
+        print(f"[incremental] scanned {sum(new for _,new in out)} new/changed file(s), reused {sum(not new for _,new in out)} sketch(es)")
+    return temps, stats
 
-    # per-file
-    recs=[]
-    for i,p in enumerate(paths,1):
-        try: T=extract_T_from_name(p.name, args.regex)
-        except Exception as e: print(f"[skip] {p.name}: {e}"); continue
-        rec=per_file_deltaF(p, T, cstar, args.require_col)
-        if rec is not None: recs.append(rec)
+def per_file_records(paths: list[Path], temps: dict, stats: dict, cstar: float, require_col: str|None,
+                     records_csv: Path|None=None, cache_dir: Path|None=None) -> list[dict]:
+    """per-file ΔF レコード。records_csv があれば、シグネチャ・温度・c*が一致する行は再計算せず再利用し、結果を書き戻す。
+    c*がスケッチ格子外なら左右カウントは生値の追加1パスで厳密に求める。"""
+    prev,old_paths={},set()
+    if records_csv is not None and Path(records_csv).exists() and Path(records_csv).stat().st_size>0:
+        try: old=pd.read_csv(records_csv, float_precision="round_trip")  # c*・T照合は厳密一致
+        except pd.errors.EmptyDataError: old=None
+        if old is not None and "path" in old.columns:
+            old_paths=set(old["path"])
+            prev={(r["path"],r["sig"],r["T"]):r for r in old.to_dict("records") if r["cstar"]==cstar}
+    recs,rows,reused=[],[],0
+    for p in paths:
+        if str(p) not in temps: continue
+        sig=file_signature(p, require_col) if records_csv is not None else None
+        # Tもキーに含める（--regex を変えるとファイル名からのTが変わる）
+        r=prev.get((str(p),sig,float(temps[str(p)])))
+        if r is not None:
+            rec={k:r[k] for k in ("path","T","n","DeltaF_signed","se","n_left","n_right")}; reused+=1
+        else:
+            st=stats[str(p)]
+            n_left=None if st is None or on_grid(st, cstar) else count_left_exact(st, cstar, require_col, cache_dir)
+            rec=deltaF_from_stats(st, temps[str(p)], cstar, n_left)
+        if rec is not None:
+            recs.append(rec); rows.append({**rec,"sig":sig,"cstar":cstar})
+    if records_csv is not None:
+        Path(records_csv).parent.mkdir(parents=True, exist_ok=True)
+        if rows: pd.DataFrame(rows).to_csv(records_csv, index=False)
+        else: Path(records_csv).unlink(missing_ok=True)  # ヘッダなしの空CSVは書かない
+        removed=len(old_paths-{str(p) for p in paths})
+        print(f"[incremental] records: {len(recs)-reused} recomputed, {reused} reused, {removed} removed")
+    return recs
 
+def filter_paths(paths: list[Path], bundles: list[str], exclude_substr: list[str]) -> list[Path]:
+    # 束フィルタ（collect_pathsと同じ規則。読み込み済み集合からの部分集合抽出用）
+    return [p for p in paths if (not bundles or any(b in p.name for b in bundles))
+            and not (exclude_substr and any(x in p.name for x in exclude_substr))]
+
+def build_records(L: int, paths: list[Path], temps: dict, stats: dict, regex: str, require_col: str|None="zb",
+                  cstar_method: str="legacy", state_dir: Path|None=None, cache_dir: Path|None=None):
+    """c*再最適化とper-file ΔFレコード。戻り値 (cstar, cstar_info, df)。"""
+    # c*再最適化（高温上位K点から）
+    cstar_info={}
+    cstar=reopt_cstar(paths, regex, require_col, top_k=4, stats=stats, cache_dir=cache_dir,
+                      method=cstar_method, info=cstar_info)
+    print(f"[c* reopt] L={L}, c*={cstar:.9g}, files={len(paths)}")
+
+    # per-file（増分モードでは状態ストアのレコードを再利用）
+    recs=per_file_records(paths, temps, stats, cstar, require_col, None if state_dir is None else Path(state_dir)/f"L{L}_records.csv",
+                          cache_dir)
     if len(recs)<3: raise SystemExit("Too few valid records.")
-    df=pd.DataFrame(recs)
-    agg=aggregate_by_T(df)
-    out_prefix=f"L{args.L}"
-    agg.to_csv(data_dir/f"{out_prefix}_DeltaF_aggregated.csv", index=False)
+    return cstar, cstar_info, pd.DataFrame(recs)
 
+def tsym_in_window(df: pd.DataFrame, agg: pd.DataFrame, twin, n_boot: int=200, boot_engine: str="vectorized", workers: int=1) -> dict:
+    """窓内の点推定(isotonic＋bracket_linearフォールバック)とbootstrap。"""
     # 窓抽出＆零点
-    T_lo,T_hi=min(args.twin),max(args.twin)
+    T_lo,T_hi=min(twin),max(twin)
     win=agg[(agg["T"]>=T_lo)&(agg["T"]<=T_hi)].sort_values("T").copy()
     Ti=win["T"].to_numpy(); Fi=win["DeltaF"].to_numpy()
     z,Fi_fit,inc = (np.nan, np.array([]), True)
@@ -204,46 +615,100 @@ def main():
             method_note = "no_root_in_window"
 
     # bootstrap（符号反転標本のみ）
-    rng=np.random.RandomState(123); groups={T:g.index.to_numpy() for T,g in df.groupby("T")}
-    T_sorted=np.array(sorted([t for t in groups.keys() if (t>=T_lo and t<=T_hi)]))
-    boots=[]
-    for b in range(args.n_boot):
-        rows=[]
-        for T in T_sorted:
-            idx=groups[T]; take=rng.choice(idx, size=len(idx), replace=True)
-            g=df.loc[take]; w=1.0/np.maximum(g["se"].to_numpy(),1e-12)**2
-            mu=float(np.sum(w*g["DeltaF_signed"])/np.sum(w))
-            rows.append((float(T),mu))
-        rows.sort(key=lambda t:t[0]); Tb=np.array([t for t,_ in rows]); Fb=np.array([f for _,f in rows])
-        if len(Tb)<2: continue
-        if not (np.nanmin(Fb) < 0 < np.nanmax(Fb)): continue
-        
-        # bootstrapでもフォールバックを適用
-        zb_iso,_,_ = isotonic_zero_auto(Tb, Fb)
-        zb = zb_iso
-        if not np.isfinite(zb):
-            zb = find_zero_linear(Tb, Fb)
-
-        if np.isfinite(zb): boots.append(zb)
-    z_med=float(np.median(boots)) if boots else np.nan
+    if boot_engine=="loop": boots=bootstrap_tsym_loop(df, T_lo, T_hi, n_boot)
+    else: boots=bootstrap_tsym(df, T_lo, T_hi, n_boot, workers=workers)
+    z_med=float(np.median(boots)) if len(boots) else np.nan
     CI=(np.nan,np.nan)
     if len(boots)>=20:
         lo,hi=np.percentile(boots,[2.5,97.5]); CI=(float(lo),float(hi))
+    return {"T_lo":T_lo,"T_hi":T_hi,"Ti":Ti,"Fi_fit":Fi_fit,"z":z,"method_note":method_note,
+            "z_med":z_med,"CI":CI,"n_temps":int(len(win))}
+
+def run_tsym(L: int, paths: list[Path], temps: dict, stats: dict, twin, regex: str, out_dir: Path,
+             bundles: list[str]=(), exclude_substr: list[str]=(), require_col: str|None="zb",
+             n_boot: int=200, boot_engine: str="vectorized", workers: int=1, cstar_method: str="legacy",
+             state_dir: Path|None=None, cache_dir: Path|None=None, prof: StageProfile|None=None) -> dict:
+    """走査済み統計量から c*・ΔF集約・T_sym(点推定/bootstrap) を求め、JSON/CSV/PDFを out_dir に保存する。"""
+    out_dir=Path(out_dir)
+    with _stage(prof, "cstar_records"):
+        cstar,cstar_info,df=build_records(L, paths, temps, stats, regex, require_col, cstar_method, state_dir, cache_dir)
+    with _stage(prof, "aggregate"):
+        agg=aggregate_by_T(df)
+        out_prefix=f"L{L}"
+        agg.to_csv(out_dir/f"{out_prefix}_DeltaF_aggregated.csv", index=False)
+
+    with _stage(prof, "tsym_bootstrap"):
+        r=tsym_in_window(df, agg, twin, n_boot, boot_engine, workers)
+    z,z_med,CI,method_note=r["z"],r["z_med"],r["CI"],r["method_note"]
 
     # 保存＆図
-    meta={"L":args.L,"method":f"bundles={args.bundles}, exclude={args.exclude_substr}, require_col={args.require_col}, {method_note}",
-          "cstar":cstar,"T_window":[T_lo,T_hi],
+    meta={"L":L,"method":f"bundles={list(bundles)}, exclude={list(exclude_substr)}, require_col={require_col}, {method_note}",
+          "cstar_method":cstar_method,"cstar":cstar,"cstar_sketch":cstar_info,"T_window":[r["T_lo"],r["T_hi"]],
           "T_sym_point": float(z) if np.isfinite(z) else None,
           "T_sym_bootstrap_median": float(z_med) if np.isfinite(z_med) else None,
           "CI_95":[float(CI[0]) if np.isfinite(CI[0]) else None, float(CI[1]) if np.isfinite(CI[1]) else None],
-          "n_files_used": int(len(df)),"n_temps_used":int(len(win)),"n_boot":int(args.n_boot)}
-    with open(data_dir/f"L{args.L}_Tsym_reconciled.json","w",encoding="utf-8") as f: json.dump(meta,f,ensure_ascii=False,indent=2)
-    plot_monotone(args.L, agg["T"].to_numpy(), agg["DeltaF"].to_numpy(),
-                  Ti, Fi_fit if len(Ti)>0 else np.array([]), z, data_dir/f"L{args.L}_DeltaF_monotone_fit.pdf", method_note)
-    print(f"Saved: L{args.L}_Tsym_reconciled.json, _DeltaF_aggregated.csv, _DeltaF_monotone_fit.pdf")
+          "n_files_used": int(len(df)),"n_temps_used":r["n_temps"],"n_boot":int(n_boot)}
+    with _stage(prof, "plot"):
+        plot_monotone(L, agg["T"].to_numpy(), agg["DeltaF"].to_numpy(),
+                      r["Ti"], r["Fi_fit"] if len(r["Ti"])>0 else np.array([]), z, out_dir/f"L{L}_DeltaF_monotone_fit.pdf", method_note)
+    if prof is not None: meta["profile"]=prof.as_dict()
+    with open(out_dir/f"L{L}_Tsym_reconciled.json","w",encoding="utf-8") as f: json.dump(meta,f,ensure_ascii=False,indent=2)
+    print(f"Saved: L{L}_Tsym_reconciled.json, _DeltaF_aggregated.csv, _DeltaF_monotone_fit.pdf")
     if np.isfinite(z): print(f"T_sym(point) = {z:.6f}")
     if np.isfinite(z_med): print(f"T_sym(bootstrap median) = {z_med:.6f}  95%CI=({CI[0]:.6f}, {CI[1]:.6f})")
+    return meta
+
+def main():
+    ap=argparse.ArgumentParser(allow_abbrev=False)
+    ap.add_argument("--data_dir", required=True)
+    ap.add_argument("--globs", required=True, help='semicolon-separated patterns')
+    ap.add_argument("--regex", required=True)
+    ap.add_argument("--L", required=True, type=int)
+    ap.add_argument("--bundles", nargs="+", default=["Final","HighRes"])
+    ap.add_argument("--exclude_substr", nargs="*", default=[])
+    ap.add_argument("--require_col", default="zb")  # 強制
+    ap.add_argument("--twin", nargs=2, required=True, type=float)
+    ap.add_argument("--n_boot", type=int, default=200)
+    ap.add_argument("--boot_engine", choices=["vectorized","loop"], default="vectorized",
+                    help="'loop': serial RandomState(123) bootstrap of the v9 release; together with --cstar_method legacy "
+                         "the output matches v9 exactly (checked by V9_Tsym_Regression_Check.py)")
+    ap.add_argument("--hist_bins", type=int, default=HIST_BINS,
+                    help="max sketch keys per file; the bin width adapts to the data range (median c* resolution ~ range/hist_bins)")
+    ap.add_argument("--cstar_method", choices=["median","legacy"], default="legacy",
+                    help="'legacy' (default, published v9 c*): 2048-bin histogram search over the raw values of the top-T series (re-reads them); 'median': exact grid minimiser of J from the merged sketch (no re-read, but c* and T_sym differ slightly from v9)")
+    ap.add_argument("--chunk_rows", type=int, default=CHUNK_ROWS, help="rows per CSV chunk")
+    ap.add_argument("--cache_dir", default=None, help="series cache directory (default: <data_dir>/.tsym_cache)")
+    ap.add_argument("--cache_max_bytes", type=int, default=CACHE_MAX_BYTES, help="evict oldest cached series beyond this size")
+    ap.add_argument("--no_cache", action="store_true", help="disable the series cache")
+    ap.add_argument("--incremental", action="store_true", help="reuse persisted per-file sketches/records; only new or changed files are read")
+    ap.add_argument("--state_dir", default=None, help="incremental state store (default: <data_dir>/.tsym_state)")
+    # 旧n_jobsは再現性のため削除済み。--workersはSeedSequence分割によりワーカー数に依らず同一結果を返す
+    ap.add_argument("--workers", type=int, default=1, help="process pool size for file scans and bootstrap blocks")
+    ap.add_argument("--profile", action="store_true", help="record per-stage wall time, bytes/rows read and peak RSS in the JSON")
+    ap.add_argument("--profile_out", default=None, help="also dump a cProfile report (.prof, readable by pstats/snakeviz)")
+    args=ap.parse_args()
+    prof=StageProfile() if (args.profile or args.profile_out) else None
+    cpr=cProfile.Profile() if args.profile_out else None
+    if cpr is not None: cpr.enable()
+
+    data_dir=Path(args.data_dir)
+    paths=collect_paths(data_dir, args.globs, args.bundles, args.exclude_substr)
+    cache_dir=None if args.no_cache else (Path(args.cache_dir) if args.cache_dir else data_dir/".tsym_cache")
+    state_dir=(Path(args.state_dir) if args.state_dir else data_dir/".tsym_state") if args.incremental else None
+    with _stage(prof, "scan"):
+        temps,stats=scan_files(paths, args.regex, args.require_col, bins=args.hist_bins, chunksize=args.chunk_rows,
+                               cache_dir=cache_dir, cache_max_bytes=args.cache_max_bytes, workers=args.workers, state_dir=state_dir)
+    if prof is not None: prof.add_io(stats.values())
+    run_tsym(args.L, paths, temps, stats, args.twin, args.regex, data_dir,
+             bundles=args.bundles, exclude_substr=args.exclude_substr, require_col=args.require_col,
+             n_boot=args.n_boot, boot_engine=args.boot_engine, workers=args.workers, cstar_method=args.cstar_method,
+             state_dir=state_dir, cache_dir=cache_dir, prof=prof)
+    if cpr is not None:
+        cpr.disable(); cpr.dump_stats(args.profile_out)
+        print(f"Saved: {args.profile_out} (cProfile)")
+    if prof is not None:
+        print("[profile] "+", ".join(f"{k}={v:.3f}s" for k,v in prof.stages.items())+f", peak_rss={prof.as_dict()['peak_rss_mb']} MB")
 
 if __name__=="__main__":
     os.environ.setdefault("OMP_NUM_THREADS","1"); os.environ.setdefault("MKL_NUM_THREADS","1")
-    main()
\ No newline at end of file
+    main()
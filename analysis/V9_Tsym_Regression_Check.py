@@ -0,0 +1,55 @@
+"""
+V9 T_sym 回帰チェック（v9公開版の出力JSONとの一致確認）
+
+同じデータに対して現行パイプラインを v9 互換設定（--cstar_method legacy, --boot_engine loop）で実行し、
+v9 が書き出した L{L}_Tsym_reconciled.json の c*・T_sym(点推定/bootstrap中央値)・95%CI・使用ファイル数と比較する。
+L・T窓・n_boot は参照JSONから取る。結果は一時ディレクトリに書くので参照JSONは上書きしない。
+不一致があれば終了コード1。
+
+実行例:
+  python analysis/V9_Tsym_Regression_Check.py --ref v9_out/L160_Tsym_reconciled.json \
+      --data_dir data --globs "*L160*.csv" --regex "T([0-9.]+)\\.csv"
+"""
+import sys, json, argparse, tempfile
+from pathlib import Path
+import numpy as np
+
+import V9_Tsym_Reconciled_Final_v8_3_resilient as tsym
+
+KEYS=["cstar","T_sym_point","T_sym_bootstrap_median","CI_95","n_files_used","n_temps_used"]
+
+def same(a, b, rtol: float) -> bool:
+    if isinstance(a, list): return len(a)==len(b) and all(same(x,y,rtol) for x,y in zip(a,b))
+    if a is None or b is None: return a is None and b is None
+    return bool(np.isclose(float(a), float(b), rtol=rtol, atol=0.0))
+
+def main():
+    ap=argparse.ArgumentParser(allow_abbrev=False)
+    ap.add_argument("--ref", required=True, help="L<L>_Tsym_reconciled.json written by the v9 release")
+    ap.add_argument("--data_dir", required=True)
+    ap.add_argument("--globs", required=True, help='semicolon-separated patterns')
+    ap.add_argument("--regex", required=True)
+    ap.add_argument("--bundles", nargs="+", default=["Final","HighRes"])
+    ap.add_argument("--exclude_substr", nargs="*", default=[])
+    ap.add_argument("--require_col", default="zb")
+    ap.add_argument("--rtol", type=float, default=0.0, help="relative tolerance (default: bitwise equal)")
+    ap.add_argument("--cache_dir", default=None, help="series cache directory (default: no cache)")
+    args=ap.parse_args()
+
+    with open(args.ref, encoding="utf-8") as f: ref=json.load(f)
+    data_dir=Path(args.data_dir)
+    paths=tsym.collect_paths(data_dir, args.globs, args.bundles, args.exclude_substr)
+    cache_dir=Path(args.cache_dir) if args.cache_dir else None
+    temps,stats=tsym.scan_files(paths, args.regex, args.require_col, cache_dir=cache_dir)
+    with tempfile.TemporaryDirectory() as out_dir:
+        meta=tsym.run_tsym(ref["L"], paths, temps, stats, ref["T_window"], args.regex, out_dir,
+                           bundles=args.bundles, exclude_substr=args.exclude_substr, require_col=args.require_col,
+                           n_boot=ref["n_boot"], boot_engine="loop", cstar_method="legacy", cache_dir=cache_dir)
+
+    bad=[k for k in KEYS if not same(ref[k], meta[k], args.rtol)]
+    for k in KEYS: print(f"{'OK ' if k not in bad else 'NG '} {k:24s} v9={ref[k]}  now={meta[k]}")
+    if bad: sys.exit(f"[regression] mismatch vs v9: {', '.join(bad)}")
+    print("[regression] matches v9 output")
+
+if __name__=="__main__":
+    main()
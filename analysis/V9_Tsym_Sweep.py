@@ -0,0 +1,87 @@
+"""
+V9 T_sym 感度スイープ（T窓 × 束フィルタ）
+
+データを1回だけ読み込み（走査済みスケッチ/キャッシュを共有）、
+  束フィルタ(--bundle_sets) × 除外フィルタ(--exclude_sets) 毎に c* と per-file ΔF を作り直し、
+  各 T窓(--twins) で点推定と bootstrap を同一プロセス内で評価する。
+結果は1つの縦持ち表 L{L}_Tsym_sweep.csv（1行＝1設定）に書き出す。
+
+実行例:
+  python analysis/V9_Tsym_Sweep.py --data_dir data --globs "*L160*.csv" --regex "T([0-9.]+)\\.csv" --L 160 \
+      --twins 0.090:0.098 0.092:0.096 --bundle_sets Final,HighRes Final --exclude_sets none r9 --n_boot 1000
+"""
+import os, argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+import V9_Tsym_Reconciled_Final_v8_3_resilient as tsym
+
+def parse_twin(s: str) -> tuple[float,float]:
+    a,b=s.split(":"); a,b=float(a),float(b)
+    return min(a,b),max(a,b)
+
+def parse_set(s: str) -> list[str]:
+    # "Final,HighRes" → ["Final","HighRes"]、"none" → []
+    return [] if s.strip().lower() in ("","none","-") else [t.strip() for t in s.split(",") if t.strip()]
+
+def main():
+    ap=argparse.ArgumentParser(allow_abbrev=False)
+    ap.add_argument("--data_dir", required=True)
+    ap.add_argument("--globs", required=True, help='semicolon-separated patterns')
+    ap.add_argument("--regex", required=True)
+    ap.add_argument("--L", required=True, type=int)
+    ap.add_argument("--twins", nargs="+", required=True, help="T windows as lo:hi")
+    ap.add_argument("--bundle_sets", nargs="+", default=["Final,HighRes"], help="comma-separated bundle sets ('none' = no filter)")
+    ap.add_argument("--exclude_sets", nargs="+", default=["none"], help="comma-separated exclude sets ('none' = nothing excluded)")
+    ap.add_argument("--require_col", default="zb")
+    ap.add_argument("--n_boot", type=int, default=200)
+    ap.add_argument("--cstar_method", choices=["median","legacy"], default="legacy")
+    ap.add_argument("--hist_bins", type=int, default=tsym.HIST_BINS)
+    ap.add_argument("--chunk_rows", type=int, default=tsym.CHUNK_ROWS)
+    ap.add_argument("--cache_dir", default=None, help="series cache directory (default: <data_dir>/.tsym_cache)")
+    ap.add_argument("--cache_max_bytes", type=int, default=tsym.CACHE_MAX_BYTES)
+    ap.add_argument("--no_cache", action="store_true")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--out", default=None, help="output CSV (default: <data_dir>/L<L>_Tsym_sweep.csv)")
+    args=ap.parse_args()
+
+    data_dir=Path(args.data_dir)
+    twins=[parse_twin(t) for t in args.twins]
+    bundle_sets=[parse_set(b) for b in args.bundle_sets]
+    exclude_sets=[parse_set(x) for x in args.exclude_sets]
+
+    # 全設定の和集合を1回だけ走査（束フィルタはファイル名のみで決まるため、後から部分集合を取る）
+    union=tsym.collect_paths(data_dir, args.globs, sorted({b for bs in bundle_sets for b in bs}) if all(bundle_sets) else [], [])
+    cache_dir=None if args.no_cache else (Path(args.cache_dir) if args.cache_dir else data_dir/".tsym_cache")
+    temps,stats=tsym.scan_files(union, args.regex, args.require_col, bins=args.hist_bins, chunksize=args.chunk_rows,
+                                cache_dir=cache_dir, cache_max_bytes=args.cache_max_bytes, workers=args.workers)
+
+    rows=[]
+    for bs in bundle_sets:
+        for xs in exclude_sets:
+            paths=tsym.filter_paths(union, bs, xs)
+            base={"L":args.L,"bundles":",".join(bs) or "none","exclude_substr":",".join(xs) or "none","cstar_method":args.cstar_method}
+            try: cstar,_,df=tsym.build_records(args.L, paths, temps, stats, args.regex, args.require_col, args.cstar_method,
+                                               cache_dir=cache_dir)
+            except SystemExit as e:
+                print(f"[sweep] bundles={bs} exclude={xs}: {e}")
+                rows+=[{**base,"T_lo":lo,"T_hi":hi,"cstar":np.nan,"n_files":len(paths),"n_temps":0,"method":"too_few_records",
+                        "T_sym_point":np.nan,"T_sym_bootstrap_median":np.nan,"CI_low":np.nan,"CI_high":np.nan} for lo,hi in twins]
+                continue
+            agg=tsym.aggregate_by_T(df)
+            for tw in twins:
+                r=tsym.tsym_in_window(df, agg, tw, args.n_boot, "vectorized", args.workers)
+                rows.append({**base,"T_lo":r["T_lo"],"T_hi":r["T_hi"],"cstar":cstar,"n_files":int(len(df)),"n_temps":r["n_temps"],
+                             "method":r["method_note"],"T_sym_point":r["z"],"T_sym_bootstrap_median":r["z_med"],
+                             "CI_low":r["CI"][0],"CI_high":r["CI"][1]})
+
+    out=Path(args.out) if args.out else data_dir/f"L{args.L}_Tsym_sweep.csv"
+    tab=pd.DataFrame(rows)
+    tab.to_csv(out, index=False)
+    print(f"Saved: {out} ({len(tab)} configurations)")
+    print(tab[["bundles","exclude_substr","T_lo","T_hi","T_sym_point","CI_low","CI_high"]].to_string(index=False))
+
+if __name__=="__main__":
+    os.environ.setdefault("OMP_NUM_THREADS","1"); os.environ.setdefault("MKL_NUM_THREADS","1")
+    main()
@@ -13,20 +13,38 @@
 #   - M50_data.csv (Fig.1 と Fig.2 の標準データ用)
 #   - M25_data.csv (Fig.2 の比較データ用)
 #   - M100_data.csv (Fig.2 の比較データ用)
+#   CSV が無ければ同名の .npy / .h5 (simulation.py のバイナリ出力) を読む
 # =================================================================
 
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
 
+def resolve_data(path):
+    """path が無ければ同じ stem のバイナリ出力 (.npy / .h5) を探す"""
+    if os.path.exists(path): return path
+    stem = os.path.splitext(path)[0]
+    for ext in ('.npy', '.h5'):
+        if os.path.exists(stem + ext): return stem + ext
+    return path
+
+def load_data(path):
+    """CSV またはバイナリ出力を DataFrame として読む (バイナリはテキスト解析なし)"""
+    if path.endswith(('.npy', '.h5')):
+        from simulation import read_series
+        data, _ = read_series(path)
+        return pd.DataFrame(data)
+    return pd.read_csv(path)
+
 def generate_fig1(data_path='M50_data.csv'):
     """Fig.1: エネルギーと粒子数の保存誤差をプロット"""
+    data_path = resolve_data(data_path)
     print(f"--- Generating Fig.1 from {data_path} ---")
     if not os.path.exists(data_path):
         print(f"[Error] Data file not found: {data_path}. Please run simulation first.")
         return
 
-    df = pd.read_csv(data_path)
+    df = load_data(data_path)
     fig, ax1 = plt.subplots(figsize=(10, 6))
     initial_energy = df['E_total'].iloc[0]
 
@@ -65,6 +83,7 @@ def generate_fig2(paths={'M25':'M25_data.csv', 'M50':'M50_data.csv', 'M100':'M10
     
     fig, ax = plt.subplots(figsize=(10, 6))
     
+    paths = {key: resolve_data(path) for key, path in paths.items()}
     all_files_found = True
     for key, path in paths.items():
         if not os.path.exists(path):
@@ -73,7 +92,7 @@ def generate_fig2(paths={'M25':'M25_data.csv', 'M50':'M50_data.csv', 'M100':'M10
     if not all_files_found: return
 
     for key, path in paths.items():
-        df = pd.read_csv(path)
+        df = load_data(path)
         info = plot_info[key]
         ax.plot(df['time'], df['z_barrier_pos'], **info)
 
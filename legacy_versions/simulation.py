@@ -4,6 +4,7 @@
 # 目的:
 #   論文で定義された3D結合場のシミュレーションを実行し、
 #   解析用の時系列データをCSVファイルとして保存する。
+#   CuPy があれば GPU、なければ NumPy (CPU) で実行する (--backend で指定可)。
 #
 # 実行方法 (コマンドライン):
 #   # 標準パラメータ (M=50) で実行
@@ -14,114 +15,764 @@
 #
 #   # M=100 で実行
 #   python simulation.py --mass 100 --output "M100_data.csv"
+#
+#   # 単精度 (complex64) で実行 / complex128 との保存則ドリフト比較
+#   python simulation.py --mass 50 --output "M50_c64.csv" --dtype complex64
+#   python simulation.py --mass 50 --output "M50_data.csv" --compare_precision
+#
+#   # 4 次シンプレクティック積分 (Yoshida / Forest-Ruth) で大きな dt を使う
+#   python simulation.py --mass 50 --output "M50_y4.csv" --integrator yoshida4 --dt 8e-5
+#   # エネルギードリフト 1e-6 以内となる最大の dt を探す (t=0.1 まで)
+#   python simulation.py --converge 1e-6 --integrator yoshida4 --converge_time 0.1
+#
+#   # 1 時間単位ごとにチェックポイントを保存し、中断したジョブを再開する
+#   python simulation.py --mass 50 --output "M50_data.csv" --checkpoint_interval 1.0
+#   python simulation.py --mass 50 --output "M50_data.csv" --checkpoint_interval 1.0 --resume
+#
+#   # M, k, kz の全組み合わせを 1 プロセスでバッチ実行 (設定ごとに 1 ファイル)
+#   python simulation.py --sweep_mass 25 50 100 --sweep_out "M{M:g}_data.csv"
+#   python simulation.py --sweep_mass 10 20 30 40 50 60 --sweep_k 5 10 --batch 4 --sweep_out "sweep/M{M:g}_k{k:g}.parquet"
+#
+#   # 追加の観測量 (名前[:ステップ間隔]) を CSV の列として記録
+#   python simulation.py --mass 50 --output "M50_data.csv" --observe v_barrier z_com:20000
+#
+#   # バイナリ出力 (追記型 .npy / .h5 + JSON サイドカー <output>.json)。読み出しは read_series()
+#   python simulation.py --mass 50 --output "M50_data.npy"
+#
+#   # CPU で 8 スレッド FFT / 64x64x256 グリッドの steps/s ベンチマーク
+#   python simulation.py --mass 50 --output "M50_data.csv" --backend numpy --workers 8
+#   python simulation.py --benchmark 200 --backend numpy --workers 8
 # =================================================================
 
 import numpy as np
-import cupy as cp
 import time
 import os
+import io
 import csv
+import json
+import struct
 import argparse
 
-def run_simulation(kz_kick, mass_barrier, k_spring, total_time, output_filename):
-    """論文の物理モデルに基づいたシミュレーションを実行する"""
-    print(f"--- Simulation Start: M={mass_barrier}, k={k_spring}, T={total_time} ---")
-    print(f"Output will be saved to: {output_filename}")
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+try:
+    import scipy.fft as sp_fft
+except ImportError:
+    sp_fft = None
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+def get_backend(name='auto'):
+    """配列モジュールを返す ('auto' は CuPy があれば GPU、なければ NumPy)"""
+    if name == 'cupy' or (name == 'auto' and cp is not None):
+        if cp is None: raise ImportError("CuPy が見つかりません。--backend numpy で CPU 実行してください")
+        return cp
+    return np
+
+def to_numpy(a):
+    return cp.asnumpy(a) if cp is not None and isinstance(a, cp.ndarray) else np.asarray(a)
 
-    # --- 1. グリッドと物理パラメータ ---
+class FFTPlan:
+    """永続バッファ buf 上の in-place 3D FFT (CPU: pyFFTW > scipy.fft > numpy.fft, GPU: cupyx.scipy.fft)
+    shape が 4 次元ならば先頭軸をバッチとして末尾 3 軸をまとめて変換する"""
+    def __init__(self, xp, shape, dtype, workers=None):
+        self.xp = xp
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        if xp is np and pyfftw is not None:
+            self.backend = 'pyfftw'
+            self.buf = pyfftw.empty_aligned(shape, dtype=dtype)
+            flags = ('FFTW_MEASURE',)  # 計画作成はバッファを上書きするのでデータ投入前に行う
+            self._fw = pyfftw.FFTW(self.buf, self.buf, axes=(-3, -2, -1), direction='FFTW_FORWARD', threads=self.workers, flags=flags)
+            self._bw = pyfftw.FFTW(self.buf, self.buf, axes=(-3, -2, -1), direction='FFTW_BACKWARD', threads=self.workers, flags=flags)
+            return
+        self.buf = xp.empty(shape, dtype=dtype)
+        if xp is np:
+            self._mod = sp_fft if sp_fft is not None else np.fft
+            self._kw = {'overwrite_x': True, 'workers': self.workers} if sp_fft is not None else {}
+        else:
+            try:
+                import cupyx.scipy.fft as cufft
+                self._mod, self._kw = cufft, {'overwrite_x': True}
+            except ImportError:
+                self._mod, self._kw = cp.fft, {}
+        self.backend = self._mod.__name__
+
+    def _run(self, fn):
+        out = fn(self.buf, axes=(-3, -2, -1), **self._kw)
+        if out is not self.buf: self.buf[...] = out
+
+    def forward(self):
+        if self.backend == 'pyfftw': self._fw()
+        else: self._run(self._mod.fftn)
+
+    def backward(self):
+        if self.backend == 'pyfftw': self._bw()  # ifftn と同じ正規化
+        else: self._run(self._mod.ifftn)
+
+# 分割法の係数: (キック係数, ドリフト係数)。キック = ポテンシャル位相 + バリア速度更新、
+# ドリフト = 場の運動エネルギー伝播 + バリア位置更新。末尾と次ステップ先頭のキックは融合される。
+_W1 = 1.0 / (2.0 - 2.0**(1/3)); _W0 = -2.0**(1/3) / (2.0 - 2.0**(1/3))
+INTEGRATORS = {
+    'legacy': None,  # 従来法: Strang 分割 + バリアの陽的 Euler 更新
+    'verlet': ([0.5, 0.5], [1.0]),  # 2 次: KDK (バリアは速度 Verlet)
+    'yoshida4': ([_W1/2, (_W1+_W0)/2, (_W0+_W1)/2, _W1/2], [_W1, _W0, _W1]),  # 4 次: Verlet の三段合成
+}
+INTEGRATORS['forest-ruth'] = INTEGRATORS['yoshida4']
+
+class CoupledField:
+    """論文の物理モデル (GP 場 + 可動バリア) の分割ステップ積分器
+
+    - バリアは z のみに依存するので 1-D プロファイル V_b(z) として計算し、x-y にブロードキャストする
+    - Hellmann-Feynman 力は z 周辺密度 rho_z(z) と dV_b/dz_b の 1-D 内積
+    - ポテンシャル位相は実数の位相角 theta に集約し cos/sin で一度だけ掛ける
+    - ステップ末尾と次ステップ先頭の半ステップ位相 (同じ |psi|^2, 同じ z_b) は 1 回の全ステップ位相に融合する
+      (step(sync=False))。出力時刻の直前だけ sync=True で半ステップに戻して同期状態を得る
+    - integrator: 'legacy' (既定・従来の出力を再現), 'verlet', 'yoshida4' (= 'forest-ruth')
+    - kz_kick, mass_barrier, k_spring に長さ B の配列を渡すと B 個の設定をバッチで同時に発展させる
+      (psi: (B,Nx,Ny,Nz), z_b/v_b: (B,))。exp_K, V_trap, FFT 計画は全設定で共有する
+    """
     Nx, Ny, Nz = 64, 64, 256
     Lx, Ly, Lz = 12.0, 12.0, 48.0
-    dt, Nt = 5e-6, int(total_time / 5e-6)
-
+    dt = 5e-6
     g_nonlinear = -15.0
     barrier_A = 0.1
     barrier_sigma = 4.0
     z0_barrier_initial = -10.0
     m_particle = 1.0
 
-    # --- 2. GPUセットアップと波数空間 ---
-    x = cp.linspace(-Lx/2, Lx/2, Nx); y = cp.linspace(-Ly/2, Ly/2, Ny); z = cp.linspace(-Lz/2, Lz/2, Nz)
-    dx, dy, dz = float(x[1]-x[0]), float(y[1]-y[0]), float(z[1]-z[0])
-    X, Y, Z = cp.meshgrid(x, y, z, indexing='ij')
-    kx = 2*cp.pi*cp.fft.fftfreq(Nx,d=dx); ky = 2*cp.pi*cp.fft.fftfreq(Ny,d=dy); kz = 2*cp.pi*cp.fft.fftfreq(Nz,d=dz)
-    Kx, Ky, Kz = cp.meshgrid(kx, ky, kz, indexing='ij')
-    K2 = Kx**2 + Ky**2 + Kz**2
-    exp_K = cp.exp(-0.5j * (K2 / (2 * m_particle)) * dt)
-
-    # --- 3. ポテンシャルと力の定義 (論文準拠) ---
-    V_trap = 0.5 * 1.0 * (X**2 + Y**2)
-
-    def get_V_barrier(z_pos):
-        return barrier_A * cp.exp(-((Z - z_pos)**2) / (2 * barrier_sigma**2))
-
-    def get_force_HF(psi, z_pos):
-        V_b = get_V_barrier(z_pos)
-        dV_dzb = V_b * (Z - z_pos) / barrier_sigma**2
-        force = -cp.sum(cp.conj(psi) * dV_dzb * psi).real * dx * dy * dz
-        return force
-
-    def get_force_restoring(z_pos):
-        return -k_spring * (z_pos - z0_barrier_initial)
-
-    # --- 4. エネルギー計算の定義 ---
-    def get_energy(psi, V_total, z_pos, v_barrier):
-        psi_k = cp.fft.fftn(psi)
-        E_kin_q = cp.sum(cp.conj(psi_k) * (K2 / (2 * m_particle)) * psi_k).real / (Nx*Ny*Nz) * dx*dy*dz
-        E_pot_q = cp.sum(cp.conj(psi) * V_total * psi).real * dx*dy*dz
-        E_kin_c = 0.5 * mass_barrier * v_barrier**2
-        return E_kin_q + E_pot_q + E_kin_c
-
-    # --- 5. 初期状態 ---
-    psi = cp.exp(-((X**2 + Y**2)/(2*1.0**2) + (Z - (-20.0))**2 / (2*2.0**2)), dtype=cp.complex128)
-    psi *= cp.exp(1j * kz_kick * Z)
-    norm = cp.sqrt(cp.sum(cp.abs(psi)**2) * dx * dy * dz)
-    psi /= norm
-
-    z_b = cp.array(z0_barrier_initial, dtype=cp.float64)
-    v_b = cp.array(0.0, dtype=cp.float64)
-
-    # --- 6. シミュレーションループ ---
+    def __init__(self, kz_kick, mass_barrier, k_spring, dtype='complex128', backend='auto', fft_workers=None,
+                 dt=None, integrator='legacy'):
+        xp = self.xp = get_backend(backend)
+        params = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (kz_kick, mass_barrier, k_spring)))
+        self.batch = params[0].shape  # () なら単一設定、(B,) ならバッチ
+        if self.batch:
+            kz_kick, mass_barrier, k_spring = (xp.asarray(v) for v in params)
+            kz_kick = kz_kick[:, None, None, None]
+        self.mass_barrier, self.k_spring = mass_barrier, k_spring
+        if dt is not None: self.dt = dt
+        if integrator not in INTEGRATORS: raise ValueError(f"unknown integrator: {integrator}")
+        self.integrator, self._scheme = integrator, INTEGRATORS[integrator]
+        self.cdtype = np.dtype(dtype)
+        self.rdtype = np.dtype(np.float32) if self.cdtype == np.complex64 else np.dtype(np.float64)
+        Nx, Ny, Nz, dt = self.Nx, self.Ny, self.Nz, self.dt
+
+        # --- グリッドと波数空間 (1-D 軸 + ブロードキャスト) ---
+        x = xp.linspace(-self.Lx/2, self.Lx/2, Nx); y = xp.linspace(-self.Ly/2, self.Ly/2, Ny); z = xp.linspace(-self.Lz/2, self.Lz/2, Nz)
+        self.dx, self.dy, self.dz = float(x[1]-x[0]), float(y[1]-y[0]), float(z[1]-z[0])
+        self.dV = self.dx * self.dy * self.dz
+        self.z = z  # float64: バリアプロファイルと力は倍精度で計算
+        X, Y, Z = x[:, None, None], y[None, :, None], z[None, None, :]
+        self.kx = 2*np.pi*xp.fft.fftfreq(Nx, d=self.dx); self.ky = 2*np.pi*xp.fft.fftfreq(Ny, d=self.dy); self.kz = 2*np.pi*xp.fft.fftfreq(Nz, d=self.dz)
+        self._exp_K = {}
+        self.exp_K = self.exp_K_for(1.0)
+        self.V_trap_xy = (0.5 * 1.0 * (X**2 + Y**2)).astype(self.rdtype)  # (Nx,Ny,1)
+
+        # --- 永続バッファ ---
+        shape = self.batch + (Nx, Ny, Nz)
+        self.fft = FFTPlan(xp, shape, self.cdtype, fft_workers)
+        self.psi = self.fft.buf
+        self._rho = xp.empty(shape, dtype=self.rdtype)
+        self._theta = xp.empty(shape, dtype=self.rdtype)
+        self._phase = xp.empty(shape, dtype=self.cdtype)
+
+        # --- 初期状態 ---
+        psi0 = xp.exp(-((X**2 + Y**2)/(2*1.0**2) + (Z - (-20.0))**2 / (2*2.0**2)), dtype=self.cdtype)
+        psi0 = psi0 * xp.exp(1j * kz_kick * Z)
+        self.psi[...] = psi0 / xp.sqrt(xp.sum(xp.abs(psi0)**2, axis=(-3, -2, -1), keepdims=True) * self.dV)
+        self.z_b = xp.full(self.batch, self.z0_barrier_initial, dtype=np.float64)
+        self.v_b = xp.zeros(self.batch, dtype=np.float64)
+        self._kicked = False  # True: psi に次ステップ先頭の半ステップ位相が適用済み
+        self._k2_prev = None  # 直前の同期ステップ最後の前進 FFT から得た sum |k|^2 |psi_k|^2 dV
+        self.observed = None
+        self.update_density()
+
+    def exp_K_for(self, frac):
+        """運動エネルギー伝播因子 exp(-0.5i K^2/(2m) frac dt) (ドリフト係数ごとに 1 回だけ構築)"""
+        e = self._exp_K.get(frac)
+        if e is None:
+            K2 = self.kx[:, None, None]**2 + self.ky[None, :, None]**2 + self.kz[None, None, :]**2
+            e = self._exp_K[frac] = self.xp.exp(-0.5j * (K2 / (2 * self.m_particle)) * (frac * self.dt)).astype(self.cdtype)
+        return e
+
+    def state_dict(self):
+        """同期状態 (sync=True の直後) の力学変数。決定論的なので乱数状態は持たない。
+        rho はキック前の |psi|^2 で再計算値と最下位ビットが異なりうるので、ビット一致の再開のため一緒に保存する"""
+        assert not self._kicked, "state_dict() は同期状態でのみ呼ぶこと"
+        k2_prev = float('nan') if self._k2_prev is None else float(self._k2_prev)
+        return {'psi': to_numpy(self.psi), 'rho': to_numpy(self._rho), 'z_b': float(self.z_b), 'v_b': float(self.v_b),
+                'k2_prev': k2_prev}
+
+    def load_state(self, state):
+        self.psi[...] = self.xp.asarray(state['psi'], dtype=self.cdtype)
+        self.z_b[...] = float(state['z_b']); self.v_b[...] = float(state['v_b'])
+        self._kicked = False
+        self._rho[...] = self.xp.asarray(state['rho'], dtype=self.rdtype)
+        self.rho_z = self.xp.sum(self._rho, axis=(-3, -2), dtype=np.float64) * (self.dx * self.dy)
+        k2_prev = state.get('k2_prev', float('nan'))
+        self._k2_prev = None if np.isnan(k2_prev) else self.xp.asarray(k2_prev)
+
+    def V_barrier_z(self, z_pos):
+        return self.barrier_A * self.xp.exp(-((self.z - z_pos[..., None])**2) / (2 * self.barrier_sigma**2))
+
+    def update_density(self):
+        xp, rho = self.xp, self._rho
+        xp.abs(self.psi, out=rho); xp.square(rho, out=rho)
+        self.rho_z = xp.sum(rho, axis=(-3, -2), dtype=np.float64) * (self.dx * self.dy)
+
+    def kick(self, frac, barrier=False):
+        """psi *= exp(-i frac dt (V_trap + V_b(z) + g|psi|^2)); barrier=True ならバリア速度も frac dt だけ更新"""
+        xp, theta, phase = self.xp, self._theta, self._phase
+        c = -frac * self.dt
+        xp.multiply(self._rho, c * self.g_nonlinear, out=theta)
+        theta += c * self.V_trap_xy
+        theta += (c * self.V_barrier_z(self.z_b)).astype(self.rdtype)[..., None, None, :]
+        xp.cos(theta, out=phase.real); xp.sin(theta, out=phase.imag)
+        self.psi *= phase
+        if barrier:
+            # rho, z_b はキック中不変なので位相と速度更新はどちらも厳密な流れ
+            self.v_b += ((self.force_HF() + self.force_restoring()) / self.mass_barrier) * (frac * self.dt)
+
+    def drift(self, frac, obs=None, sync=False):
+        self.fft.forward()
+        self._harvest_spectrum(obs, sync)
+        self.psi *= self.exp_K_for(frac)
+        self.fft.backward()
+        self.z_b += self.v_b * (frac * self.dt)
+        self.update_density()
+
+    def force_HF(self):
+        V_b = self.V_barrier_z(self.z_b)
+        dV_dzb = V_b * (self.z - self.z_b[..., None]) / self.barrier_sigma**2
+        return -self.xp.sum(self.rho_z * dV_dzb, axis=-1) * self.dz
+
+    def force_restoring(self):
+        return -self.k_spring * (self.z_b - self.z0_barrier_initial)
+
+    def step(self, sync=True, observe=False):
+        """1 ステップ進める。observe=True (同期状態からのステップのみ) なら開始時刻の観測量を self.observed に収集する"""
+        obs = self._observe_begin() if observe else None
+        if self._scheme is not None: return self._step_split(sync, obs)
+        if not self._kicked: self.kick(0.5)
+        if obs is not None: self._observe_potential(obs, 0.5)
+        self.fft.forward()
+        self._harvest_spectrum(obs, sync)
+        self.psi *= self.exp_K
+        self.fft.backward()
+        self.update_density()
+        self.v_b += ((self.force_HF() + self.force_restoring()) / self.mass_barrier) * self.dt
+        self.z_b += self.v_b * self.dt
+        # 末尾の半ステップ + 次ステップ先頭の半ステップ (|psi|^2, z_b 共通) を融合
+        self._kicked = not sync
+        self.kick(0.5 if sync else 1.0)
+
+    def _step_split(self, sync, obs=None):
+        kicks, drifts = self._scheme
+        if not self._kicked: self.kick(kicks[0], barrier=True)
+        if obs is not None: self._observe_potential(obs, kicks[0])
+        for i, d in enumerate(drifts):
+            self.drift(d, obs=obs if i == 0 else None, sync=sync and i + 1 == len(drifts))
+            if i + 1 < len(drifts): self.kick(kicks[i + 1], barrier=True)
+        self._kicked = not sync
+        self.kick(kicks[-1] if sync else kicks[-1] + kicks[0], barrier=True)
+
+    # --- 観測量 ---
+    # 同期状態 psi_n の運動項 T(psi) = sum |k|^2 |psi_k|^2 dV は追加 FFT なしで求める。
+    # 同期キック exp(i theta) の前後の状態 e^{-i theta} psi_n (直前ステップ最後のドリフト) と
+    # e^{+i theta} psi_n (次ステップ最初のドリフト) の psi_k はステップ内で既に得られており、
+    # T(e^{±i theta} psi) = T(psi) ± (位相について奇の項) + sum rho |grad theta|^2 dV なので
+    # T(psi_n) = (T_- + T_+)/2 - sum rho |grad theta|^2 dV (補正は O(dt^2)、差分で評価)。
+    # ポテンシャル項は同じキックの位相角 theta = -frac dt V_total から sum rho theta / (-frac dt) で得る。
+
+    def _dot(self, a, b):
+        """sum a*b dV (バッチなら設定ごと)"""
+        s = self.xp.vdot(a.ravel(), b.ravel()) if not self.batch else self.xp.einsum('bijk,bijk->b', a, b)
+        return s * self.dV
+
+    def _k2_sum(self, psi_k):
+        """sum |k|^2 |psi_k|^2 dV (psi_k は正規化なしの FFT)"""
+        xp = self.xp
+        a = xp.abs(psi_k)**2
+        k2_sum = (xp.sum(a, axis=(-2, -1)) @ self.kx**2 + xp.sum(a, axis=(-3, -1)) @ self.ky**2 + xp.sum(a, axis=(-3, -2)) @ self.kz**2)
+        return k2_sum / (self.Nx*self.Ny*self.Nz) * self.dV
+
+    def _observe_begin(self):
+        assert not self._kicked, "observe=True は同期状態からのステップでのみ使える"
+        obs = {'z_b': self.z_b.copy(), 'v_b': self.v_b.copy(), 'norm': self.norm(), 'k2_minus': self._k2_prev}
+        if self._k2_prev is None:  # 初回 (直前に同期ステップがない) だけは FFT で直接求める
+            obs['k2'] = self._k2_sum(self.xp.fft.fftn(self.psi, axes=(-3, -2, -1)))
+        return obs
+
+    def _observe_potential(self, obs, frac):
+        xp, rho, theta = self.xp, self._rho, self._theta
+        obs['E_pot'] = self._dot(rho, theta) / (-frac * self.dt)  # sum rho V_total dV
+        obs['rho2'] = self._dot(rho, rho)
+        if 'k2' not in obs:
+            grads = xp.gradient(theta, self.dx, self.dy, self.dz, axis=(-3, -2, -1))
+            obs['k2_corr'] = self._dot(rho, sum(gr * gr for gr in grads))
+
+    def _harvest_spectrum(self, obs, sync):
+        """前進 FFT 直後 (self.psi = psi_k) に呼ぶ"""
+        k2 = self._k2_sum(self.psi) if obs is not None or sync else None
+        self._k2_prev = k2 if sync else None
+        if obs is None: return
+        if 'k2' not in obs: obs['k2'] = 0.5 * (obs['k2_minus'] + k2) - obs['k2_corr']
+        kin_c = 0.5 * self.mass_barrier * obs['v_b']**2
+        obs['E_total'] = obs['k2'] / (2 * self.m_particle) + obs['E_pot'] + kin_c
+        obs['H'] = (0.5 * obs['k2'] / (2 * self.m_particle) + obs['E_pot'] - 0.5 * self.g_nonlinear * obs['rho2'] + kin_c
+                    + 0.5 * self.k_spring * (obs['z_b'] - self.z0_barrier_initial)**2)
+        self.observed = obs
+
+    def _energy_parts(self):
+        xp, rho = self.xp, self._rho
+        return {
+            'k2': self._k2_sum(xp.fft.fftn(self.psi, axes=(-3, -2, -1))),  # sum |k|^2 |psi_k|^2 dV
+            'trap': xp.sum(xp.sum(rho, axis=-1, dtype=np.float64) * self.V_trap_xy[:, :, 0], axis=(-2, -1)) * self.dV,
+            'bar': xp.sum(self.rho_z * self.V_barrier_z(self.z_b), axis=-1) * self.dz,
+            'rho2': self._dot(rho, rho),
+        }
+
+    def energy(self):
+        """同期状態 (sync=True の直後) の全エネルギー。V_total = V_trap + V_b + g|psi|^2 (従来の定義)"""
+        e = self._energy_parts()
+        E_kin_q = e['k2'] / (2 * self.m_particle)
+        E_kin_c = 0.5 * self.mass_barrier * self.v_b**2
+        return E_kin_q + e['trap'] + e['bar'] + self.g_nonlinear * e['rho2'] + E_kin_c
+
+    def hamiltonian(self):
+        """積分器が保存するハミルトニアン (同期状態で評価)
+
+        伝播因子 exp(-0.5i K^2/(2m) dt) に対応する運動項 0.5 K^2/(2m)、非線形項 g/2 |psi|^4、
+        バリアの運動エネルギーとばねエネルギーを含む。CSV の E_total (従来の定義) とは異なる。
+        """
+        e = self._energy_parts()
+        return (0.5 * e['k2'] / (2 * self.m_particle) + e['trap'] + e['bar'] + 0.5 * self.g_nonlinear * e['rho2']
+                + 0.5 * self.mass_barrier * self.v_b**2 + 0.5 * self.k_spring * (self.z_b - self.z0_barrier_initial)**2)
+
+    def norm(self):
+        return self.xp.sum(self.rho_z, axis=-1) * self.dz
+
+    def synchronize(self):
+        if self.xp is not np: self.xp.cuda.Stream.null.synchronize()
+
+# 追加の観測量: 名前 -> fn(sim)。同期状態で評価され、CSV の列として記録される
+OBSERVABLES = {
+    'v_barrier': lambda sim: sim.v_b,
+    'force_HF': lambda sim: sim.force_HF(),
+    'z_com': lambda sim: sim.xp.sum(sim.rho_z * sim.z, axis=-1) * sim.dz,
+    'hamiltonian': lambda sim: sim.hamiltonian(),  # 追加 FFT あり
+}
+
+def register_observable(name, fn):
+    """fn(sim) -> スカラー (バッチなら (B,)) を観測量 name として登録する"""
+    OBSERVABLES[name] = fn
+    return fn
+
+def _observable_schedule(observables, record_every):
+    """{名前: ステップ間隔 or None} -> [(名前, fn, 間隔)]。間隔は record_every の倍数 (同期状態で評価するため)"""
+    sched = []
+    for name, every in (observables or {}).items():
+        if name not in OBSERVABLES: raise ValueError(f"unknown observable: {name} (known: {sorted(OBSERVABLES)})")
+        every = every or record_every
+        if every % record_every: raise ValueError(f"observable {name}: interval {every} is not a multiple of {record_every}")
+        sched.append((name, OBSERVABLES[name], every))
+    return sched
+
+# --- 時系列出力 ---
+NPY_HEADER_BYTES = 128  # 行数を書き換えてもヘッダ長が変わらないよう固定長にする
+
+def _npy_header(rows, ncols):
+    h = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, %d), }" % (rows, ncols)
+    h = h.ljust(NPY_HEADER_BYTES - 11) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(h)) + h.encode('latin1')
+
+class SeriesWriter:
+    """時系列ログの書き出し。拡張子で形式を選ぶ: .csv (従来), .npy (追記型 NPY), .h5 (HDF5)
+
+    行は buffer_rows 行ずつ (バイナリ形式では xp 上のバッファに) 貯めてまとめて書き出すので、
+    GPU 実行でも行ごとのホスト転送は起きない。バイナリ形式では <path>.json に列名・パラメータ・
+    確定行数を保存し、.npy はフラッシュごとにヘッダの行数を書き換える (途中で落ちても先頭部分は読める)。
+    position() はチェックポイントに記録する書き込み位置、resume_pos を与えるとそこまで切り詰めて追記する。
+    """
+    def __init__(self, path, columns, params=None, buffer_rows=4096, xp=np, resume_pos=None):
+        self.path, self.columns, self.params = path, list(columns), params or {}
+        self.format = os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+        if self.format not in ('csv', 'npy', 'h5'): raise ValueError(f"unsupported output format: {path}")
+        self.xp, self.buffer_rows, self._n = xp, buffer_rows, 0
+        ncols = len(self.columns)
+        if self.format == 'csv':
+            self._rows = []
+            self._f = open(path, 'r+' if resume_pos is not None else 'w', newline='')
+            if resume_pos is not None: self._f.truncate(resume_pos); self._f.seek(resume_pos)
+            self._csv = csv.writer(self._f)
+            if resume_pos is None: self._csv.writerow(self.columns)
+            return
+        self._buf = xp.empty((buffer_rows, ncols), dtype=np.float64)
+        self.rows = resume_pos or 0
+        if self.format == 'npy':
+            self._f = open(path, 'r+b' if resume_pos is not None else 'w+b')
+            self._f.truncate(NPY_HEADER_BYTES + self.rows * ncols * 8)
+            self._f.seek(0); self._f.write(_npy_header(self.rows, ncols))
+        else:
+            if h5py is None: raise ImportError("h5py が見つかりません。.npy か .csv で出力してください")
+            self._h5 = h5py.File(path, 'r+' if resume_pos is not None else 'w')
+            if resume_pos is None:
+                self._ds = self._h5.create_dataset('series', shape=(0, ncols), maxshape=(None, ncols), dtype='f8',
+                                                   chunks=(buffer_rows, ncols))
+                self._ds.attrs['columns'] = json.dumps(self.columns)
+            else:
+                self._ds = self._h5['series']; self._ds.resize(self.rows, axis=0)
+        self._write_sidecar()
+
+    def append(self, row):
+        """row: スカラー (float / 0-d xp 配列) の並び。'' は欠測 (バイナリでは NaN)"""
+        if self.format == 'csv':
+            self._rows.append([v if isinstance(v, str) else float(v) for v in row])
+        elif self.xp is np:
+            self._buf[self._n] = [np.nan if isinstance(v, str) else v for v in row]
+        else:
+            for j, v in enumerate(row): self._buf[self._n, j] = np.nan if isinstance(v, str) else v  # デバイス上で代入
+        self._n += 1
+        if self._n == self.buffer_rows: self.flush()
+
+    def flush(self, fsync=False):
+        if self.format == 'csv':
+            self._csv.writerows(self._rows); self._rows = []
+            self._f.flush()
+            if fsync: os.fsync(self._f.fileno())
+            return
+        if self._n:
+            data = to_numpy(self._buf[:self._n])
+            if self.format == 'npy':
+                self._f.seek(0, 2); self._f.write(data.astype('<f8').tobytes())
+                self.rows += self._n
+                self._f.seek(0); self._f.write(_npy_header(self.rows, len(self.columns)))
+            else:
+                self._ds.resize(self.rows + self._n, axis=0); self._ds[self.rows:] = data
+                self.rows += self._n
+            self._n = 0
+        if self.format == 'npy':
+            self._f.flush()
+            if fsync: os.fsync(self._f.fileno())
+        else:
+            self._h5.flush()
+        self._write_sidecar()
+
+    def position(self):
+        self.flush(fsync=True)
+        return self._f.tell() if self.format == 'csv' else self.rows
+
+    def _write_sidecar(self):
+        meta = {'format': self.format, 'columns': self.columns, 'rows': self.rows, 'dtype': 'float64', 'params': self.params}
+        tmp = self.path + '.json.tmp'
+        with open(tmp, 'w') as fh: json.dump(meta, fh, indent=1)
+        os.replace(tmp, self.path + '.json')
+
+    def close(self):
+        self.flush()
+        (self._h5 if self.format == 'h5' else self._f).close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def read_series(path, columns=None, mmap=True):
+    """simulation.py の時系列出力 (.csv / .npy / .h5) を読む。戻り値: ({列名: np.ndarray}, メタデータ)
+
+    .npy はメモリマップで開くので、列の取り出しはテキスト解析なしのストライド参照になる。
+    """
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    meta = {}
+    if os.path.exists(path + '.json'):
+        with open(path + '.json') as fh: meta = json.load(fh)
+    if fmt == 'npy':
+        arr = np.load(path, mmap_mode='r' if mmap else None)
+        cols = meta.get('columns') or [f'c{j}' for j in range(arr.shape[1])]
+    elif fmt == 'h5':
+        if h5py is None: raise ImportError("h5py が見つかりません")
+        with h5py.File(path, 'r') as h:
+            arr = h['series'][...]; cols = json.loads(h['series'].attrs['columns'])
+    else:
+        arr = np.genfromtxt(path, delimiter=',', skip_header=1, ndmin=2)
+        with open(path, newline='') as fh: cols = next(csv.reader(fh))
+        meta.setdefault('columns', cols)
+    want = columns or cols
+    return {c: arr[:, cols.index(c)] for c in want}, meta
+
+def save_checkpoint(path, sim, n, output_pos, params):
+    """チェックポイントを一時ファイルに書いて fsync 後に os.replace で置き換える (途中で落ちても旧版が残る)"""
+    state = sim.state_dict()
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as fh:
+        np.savez(fh, psi=state['psi'], rho=state['rho'], z_b=state['z_b'], v_b=state['v_b'], k2_prev=state['k2_prev'],
+                 step=n, output_pos=output_pos,
+                 params=np.array(json.dumps(params, sort_keys=True)))
+        fh.flush(); os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+def load_checkpoint(path):
+    with np.load(path, allow_pickle=False) as z:
+        return {'psi': z['psi'], 'rho': z['rho'], 'z_b': float(z['z_b']), 'v_b': float(z['v_b']),
+                'k2_prev': float(z['k2_prev']) if 'k2_prev' in z else float('nan'), 'step': int(z['step']),
+                'output_pos': int(z['output_pos']), 'params': json.loads(str(z['params']))}
+
+def run_simulation(kz_kick, mass_barrier, k_spring, total_time, output_filename, dtype='complex128',
+                   backend='auto', fft_workers=None, record_every=None, integrator='legacy', dt=None,
+                   checkpoint_every=0, checkpoint_path=None, resume=False, observables=None):
+    """論文の物理モデルに基づいたシミュレーションを実行する
+
+    dtype='complex64' で場・ポテンシャルを単精度にする (バリア座標・速度は float64 のまま)。
+    record_every を省略すると出力間隔は時間 0.01 ごと (dt=5e-6 で 2000 ステップ) になる。
+    checkpoint_every > 0 のとき、そのステップ数ごと (record_every の倍数に切り上げ) に
+    psi, |psi|^2, z_b, v_b, ステップ番号, 出力の書き込み位置, パラメータを checkpoint_path
+    (既定: <output>.ckpt.npz) へ保存する。resume=True ならそこから再開し、出力は
+    チェックポイント時点の位置で切り詰めて追記する。正常終了時にチェックポイントは削除される。
+    出力形式は output_filename の拡張子で決まる (.csv / .npy / .h5、SeriesWriter を参照)。
+    observables={名前: ステップ間隔} で OBSERVABLES の観測量を追加の列として記録する (間隔外の行は空欄)。
+    E_total, norm はステップ内で得られる psi_k と位相角から収集する (step(observe=True))。
+    """
+    sim = CoupledField(kz_kick, mass_barrier, k_spring, dtype=dtype, backend=backend, fft_workers=fft_workers,
+                       dt=dt, integrator=integrator)
+    dt = sim.dt
+    Nt = int(total_time / dt)
+    if record_every is None: record_every = max(1, int(round(0.01 / dt)))
+    if checkpoint_every: checkpoint_every = -(-checkpoint_every // record_every) * record_every
+    checkpoint_path = checkpoint_path or output_filename + '.ckpt.npz'
+    # 再開時に一致が必要なパラメータ (total_time は延長できるので含めない)
+    sched = _observable_schedule(observables, record_every)
+    params = {'kz_kick': kz_kick, 'mass_barrier': mass_barrier, 'k_spring': k_spring, 'dt': dt,
+              'dtype': sim.cdtype.name, 'integrator': integrator, 'record_every': record_every,
+              'observables': [[name, every] for name, _, every in sched]}
+    print(f"--- Simulation Start: M={mass_barrier}, k={k_spring}, T={total_time}, dtype={sim.cdtype.name}, "
+          f"backend={sim.xp.__name__}/{sim.fft.backend}, integrator={integrator}, dt={dt:g} ---")
+    print(f"Output will be saved to: {output_filename}")
+
+    n0, resume_pos = 0, None
+    if resume and os.path.exists(checkpoint_path):
+        ck = load_checkpoint(checkpoint_path)
+        bad = {k: (ck['params'].get(k), v) for k, v in params.items() if ck['params'].get(k) != v}
+        if bad: raise ValueError(f"checkpoint parameters do not match this run: {bad}")
+        sim.load_state(ck)
+        n0, resume_pos = ck['step'], ck['output_pos']
+        print(f"Resuming from {checkpoint_path} at step {n0} (t={n0*dt:.4f})")
+    elif resume:
+        print(f"No checkpoint at {checkpoint_path}; starting from t=0")
+    columns = ['time', 'z_barrier_pos', 'E_total', 'norm'] + [name for name, _, _ in sched]
+
     print("Main loop starting...")
     start_time = time.time()
-    with open(output_filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['time', 'z_barrier_pos', 'E_total', 'norm'])
-
-        for n in range(Nt + 1):
-            if n % 2000 == 0:
-                V_b = get_V_barrier(z_b)
-                V_nl = g_nonlinear * cp.abs(psi)**2
-                V_total = V_trap + V_b + V_nl
-                current_energy = get_energy(psi, V_total, z_b, v_b)
-                current_norm = cp.sum(cp.abs(psi)**2) * dx * dy * dz
-                writer.writerow([n * dt, float(z_b.get()), float(current_energy.get()), float(current_norm.get())])
+    with SeriesWriter(output_filename, columns, dict(params, total_time=total_time), xp=sim.xp, resume_pos=resume_pos) as out:
+        for n in range(n0, Nt + 1):
+            if checkpoint_every and n > n0 and n % checkpoint_every == 0:
+                save_checkpoint(checkpoint_path, sim, n, out.position(), params)
+            record = n % record_every == 0
+            # 値は同期状態のコピーとして保持 (v_b などはこの後のステップで書き換わる)
+            if record: extra = [sim.xp.array(fn(sim), dtype=np.float64) if n % every == 0 else '' for _, fn, every in sched]
+            # 次の出力時刻と最終ステップの直前だけ半ステップ位相で同期する
+            sim.step(sync=((n + 1) % record_every == 0 or n == Nt), observe=record)
+            if record:
+                o = sim.observed
+                out.append([n * dt, o['z_b'], o['E_total'], o['norm']] + extra)
                 if n % 20000 == 0:
-                    print(f"Step {n}/{Nt}, Time: {n*dt:.2f}, Barrier Z: {float(z_b.get()):.3f}")
-
-            V_b = get_V_barrier(z_b)
-            V_nl = g_nonlinear * cp.abs(psi)**2
-            V_total = V_trap + V_b + V_nl
-            psi *= cp.exp(-0.5j * V_total * dt)
-            psi_k = cp.fft.fftn(psi)
-            psi_k *= exp_K
-            psi = cp.fft.ifftn(psi_k)
-            force_hf = get_force_HF(psi, z_b)
-            force_res = get_force_restoring(z_b)
-            v_b += ((force_hf + force_res) / mass_barrier) * dt
-            z_b += v_b * dt
-            V_b = get_V_barrier(z_b)
-            V_nl = g_nonlinear * cp.abs(psi)**2
-            V_total = V_trap + V_b + V_nl
-            psi *= cp.exp(-0.5j * V_total * dt)
+                    print(f"Step {n}/{Nt}, Time: {n*dt:.2f}, Barrier Z: {float(o['z_b']):.3f}")
 
+    if checkpoint_every and os.path.exists(checkpoint_path): os.remove(checkpoint_path)
     print(f"--- Simulation Finished. Total time: {time.time() - start_time:.2f} sec ---")
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description="3D Coupled Field Simulation (Publication Version)")
+def sweep_configs(masses, springs, kicks):
+    """(M, k, kz) の全組み合わせ"""
+    return [(M, k, kz) for M in masses for k in springs for kz in kicks]
+
+def run_sweep(configs, total_time, output_pattern, batch_size=None, dtype='complex128', backend='auto',
+              fft_workers=None, record_every=None, integrator='legacy', dt=None):
+    """(M, k, kz) の設定リストを batch_size 個ずつバッチ場として同時に発展させ、設定ごとに 1 ファイル書き出す
+
+    output_pattern は {M}, {k}, {kz} を含む書式文字列 (例: "M{M:g}_k{k:g}.csv")。
+    拡張子 .parquet なら終了時に pandas で Parquet として保存し、それ以外は SeriesWriter (.csv / .npy / .h5) で書く。
+    列は run_simulation の CSV と同じ。戻り値: 出力ファイルのリスト
+    """
+    configs = [tuple(map(float, c)) for c in configs]
+    batch_size = batch_size or len(configs)
+    paths = [output_pattern.format(M=M, k=k, kz=kz) for M, k, kz in configs]
+    if len(set(paths)) != len(paths): raise ValueError("output_pattern must distinguish every (M, k, kz) configuration")
+    header = ['time', 'z_barrier_pos', 'E_total', 'norm']
+    if any(p.endswith('.parquet') for p in paths):
+        import pandas as pd
+        pd.DataFrame(columns=header).to_parquet(io.BytesIO())  # Parquet エンジン (pyarrow 等) が無ければ実行前に失敗させる
+    start_time = time.time()
+    for i0 in range(0, len(configs), batch_size):
+        chunk, chunk_paths = configs[i0:i0 + batch_size], paths[i0:i0 + batch_size]
+        M, k, kz = (list(v) for v in zip(*chunk))
+        sim = CoupledField(kz, M, k, dtype=dtype, backend=backend, fft_workers=fft_workers, dt=dt, integrator=integrator)
+        dt_ = sim.dt
+        Nt = int(total_time / dt_)
+        rec = record_every or max(1, int(round(0.01 / dt_)))
+        print(f"--- Sweep batch {i0 // batch_size + 1}: {len(chunk)} configs, T={total_time}, dtype={sim.cdtype.name}, "
+              f"backend={sim.xp.__name__}/{sim.fft.backend}, integrator={integrator}, dt={dt_:g} ---")
+        for p in chunk_paths:
+            if os.path.dirname(p): os.makedirs(os.path.dirname(p), exist_ok=True)
+        parquet = [p.endswith('.parquet') for p in chunk_paths]
+        writers = [None if pq else SeriesWriter(p, header, {'kz_kick': c[2], 'mass_barrier': c[0], 'k_spring': c[1],
+                                                            'dt': dt_, 'integrator': integrator, 'total_time': total_time},
+                                                xp=sim.xp)
+                   for p, pq, c in zip(chunk_paths, parquet, chunk)]
+        rows = [[] for _ in chunk]
+        try:
+            for n in range(Nt + 1):
+                sim.step(sync=((n + 1) % rec == 0 or n == Nt), observe=(n % rec == 0))
+                if n % rec == 0:
+                    o = sim.observed
+                    z_b, E, N = o['z_b'], o['E_total'], o['norm']
+                    for b in range(len(chunk)):
+                        row = [n * dt_, z_b[b], E[b], N[b]]
+                        if writers[b] is not None: writers[b].append(row)
+                        else: rows[b].append([float(v) for v in row])
+                    if n % 20000 == 0:
+                        print(f"Step {n}/{Nt}, Time: {n*dt_:.2f}, Barrier Z: " + " ".join(f"{v:.3f}" for v in to_numpy(z_b)))
+        finally:
+            for w in writers:
+                if w is not None: w.close()
+        for b, pq in enumerate(parquet):
+            if pq:
+                pd.DataFrame(rows[b], columns=header).to_parquet(chunk_paths[b], index=False)
+        del sim
+    print(f"--- Sweep Finished: {len(configs)} configs. Total time: {time.time() - start_time:.2f} sec ---")
+    return paths
+
+def convergence_study(tol, integrator='yoshida4', t_end=0.1, dt_start=5e-6, max_doublings=10, samples=20,
+                      kz_kick=0.15, mass_barrier=50.0, k_spring=10.0, **kw):
+    """dt を dt_start から 2 倍ずつ増やし、ハミルトニアンの相対ドリフト max|H(t)-H(0)|/|H(0)| (t <= t_end)
+    が tol 以下となる最大の dt を返す。戻り値: (best_dt or None, 各 dt の結果リスト)"""
+    best, rows = None, []
+    for j in range(max_doublings + 1):
+        dt = dt_start * 2**j
+        if dt > t_end: break
+        n_steps = max(1, int(round(t_end / dt)))
+        every = max(1, n_steps // samples)
+        sim = CoupledField(kz_kick, mass_barrier, k_spring, dt=dt, integrator=integrator, **kw)
+        H0 = float(sim.hamiltonian()); drift = 0.0
+        t0 = time.perf_counter()
+        for n in range(n_steps):
+            sync = (n + 1) % every == 0 or n == n_steps - 1
+            sim.step(sync=sync)
+            if sync:
+                d = abs(float(sim.hamiltonian()) - H0) / abs(H0)
+                drift = d if not np.isfinite(d) else max(drift, d)
+                if not np.isfinite(drift): break
+        row = {'integrator': integrator, 'dt': dt, 'steps': n_steps, 'max_rel_H_drift': drift,
+               'seconds': time.perf_counter() - t0, 'ok': bool(drift <= tol)}
+        rows.append(row); print(json.dumps(row))
+        if not row['ok']: break
+        best = dt
+    print(f"--- largest dt with drift <= {tol:g}: {best} ({integrator}) ---")
+    return best, rows
+
+def benchmark(steps=200, dtype='complex128', backend='auto', fft_workers=None, kz_kick=0.15, mass_barrier=50.0, k_spring=10.0,
+              integrator='legacy'):
+    """64x64x256 グリッドでの steps/s を計測する (出力なし・融合ステップ)"""
+    sim = CoupledField(kz_kick, mass_barrier, k_spring, dtype=dtype, backend=backend, fft_workers=fft_workers,
+                       integrator=integrator)
+    for _ in range(3): sim.step(sync=False)  # ウォームアップ
+    sim.synchronize()
+    t0 = time.perf_counter()
+    for _ in range(steps): sim.step(sync=False)
+    sim.synchronize()
+    elapsed = time.perf_counter() - t0
+    report = {'grid': f"{sim.Nx}x{sim.Ny}x{sim.Nz}", 'backend': sim.xp.__name__, 'fft': sim.fft.backend,
+              'workers': sim.fft.workers, 'dtype': sim.cdtype.name, 'integrator': integrator, 'steps': steps,
+              'seconds': elapsed, 'steps_per_s': steps / elapsed}
+    print(json.dumps(report))
+    return report
+
+def _read_conservation(path):
+    data, _ = read_series(path, ['time', 'E_total', 'norm'])
+    return [data[c].tolist() for c in ('time', 'E_total', 'norm')]
+
+def compare_precision(kz_kick, mass_barrier, k_spring, total_time, output_filename, **kw):
+    """complex128 と complex64 を同条件で走らせ、エネルギー・ノルムのドリフトを比較する"""
+    stem, ext = os.path.splitext(output_filename)
+    out64 = f"{stem}_c64{ext or '.csv'}"
+    t0 = time.time(); run_simulation(kz_kick, mass_barrier, k_spring, total_time, output_filename, 'complex128', **kw); t_ref = time.time() - t0
+    t0 = time.time(); run_simulation(kz_kick, mass_barrier, k_spring, total_time, out64, 'complex64', **kw); t_low = time.time() - t0
+    _, E_ref, N_ref = _read_conservation(output_filename)
+    _, E_low, N_low = _read_conservation(out64)
+    n = min(len(E_ref), len(E_low))
+    scale = max(abs(E_ref[0]), 1e-300)
+    report = {
+        'energy_drift_c128': max(abs(e - E_ref[0]) for e in E_ref[:n]) / scale,
+        'energy_drift_c64': max(abs(e - E_low[0]) for e in E_low[:n]) / scale,
+        'max_rel_energy_dev': max(abs(a - b) for a, b in zip(E_low[:n], E_ref[:n])) / scale,
+        'norm_drift_c128': max(abs(v - 1.0) for v in N_ref[:n]),
+        'norm_drift_c64': max(abs(v - 1.0) for v in N_low[:n]),
+        'speedup': t_ref / t_low,
+    }
+    for k, v in report.items(): print(f"  {k}: {v:.3e}")
+    return report
+
+def main(description="3D Coupled Field Simulation (Publication Version)", default_backend='auto'):
+    parser = argparse.ArgumentParser(description=description)
     parser.add_argument('--kz', type=float, default=0.15, help='Initial momentum kick')
     parser.add_argument('--mass', type=float, default=50.0, help='Effective mass of the barrier')
     parser.add_argument('--k', type=float, default=10.0, help='Spring constant')
     parser.add_argument('--time', type=float, default=40.0, help='Total simulation time')
-    parser.add_argument('--output', type=str, required=True, help='Output CSV filename (e.g., M50_data.csv)')
+    parser.add_argument('--output', type=str, help='Output file: .csv, or binary .npy/.h5 with a .json sidecar (e.g., M50_data.csv)')
+    parser.add_argument('--dtype', choices=['complex128', 'complex64'], default='complex128', help='Field precision')
+    parser.add_argument('--compare_precision', action='store_true',
+                        help='Run complex128 and complex64 (<output>_c64.csv) and report energy/norm drift')
+    parser.add_argument('--backend', choices=['auto', 'numpy', 'cupy'], default=default_backend,
+                        help='Array backend (auto: CuPy if installed, else NumPy; default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=None, help='FFT threads on CPU (default: all cores)')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='STEPS',
+                        help='Report steps/s on the 64x64x256 grid over STEPS steps and exit')
+    parser.add_argument('--integrator', choices=sorted(INTEGRATORS), default='legacy',
+                        help='Time integrator (legacy: original Strang + Euler barrier update)')
+    parser.add_argument('--dt', type=float, default=None, help='Time step (default 5e-6)')
+    parser.add_argument('--converge', type=float, default=None, metavar='TOL',
+                        help='Find the largest dt whose Hamiltonian drift stays below TOL and exit')
+    parser.add_argument('--converge_time', type=float, default=0.1, help='Horizon for --converge')
+    parser.add_argument('--sweep_mass', type=float, nargs='+', default=None,
+                        help='Batched sweep: barrier masses (combined with --sweep_k / --sweep_kz)')
+    parser.add_argument('--sweep_k', type=float, nargs='+', default=None, help='Sweep spring constants (default: --k)')
+    parser.add_argument('--sweep_kz', type=float, nargs='+', default=None, help='Sweep initial kicks (default: --kz)')
+    parser.add_argument('--sweep_out', type=str, default='sweep_M{M:g}_k{k:g}_kz{kz:g}.csv',
+                        help='Per-configuration output pattern with {M}, {k}, {kz} (.csv or .parquet)')
+    parser.add_argument('--batch', type=int, default=None, help='Configurations evolved together (default: all)')
+    parser.add_argument('--observe', nargs='+', default=[], metavar='NAME[:STEPS]',
+                        help=f'Extra CSV columns, optionally every STEPS steps (known: {", ".join(sorted(OBSERVABLES))})')
+    parser.add_argument('--checkpoint_interval', type=float, default=0.0,
+                        help='Simulation time between checkpoints (default: 0 = no checkpoints)')
+    parser.add_argument('--checkpoint', type=str, default=None, help='Checkpoint file (default: <output>.ckpt.npz)')
+    parser.add_argument('--resume', action='store_true', help='Resume from the checkpoint if it exists')
     args = parser.parse_args()
-    run_simulation(args.kz, args.mass, args.k, args.time, args.output)
+    kw = dict(backend=args.backend, fft_workers=args.workers)
+    if args.benchmark:
+        benchmark(args.benchmark, dtype=args.dtype, integrator=args.integrator, **kw)
+        return
+    if args.converge is not None:
+        convergence_study(args.converge, integrator=args.integrator, t_end=args.converge_time,
+                          dt_start=args.dt or CoupledField.dt, kz_kick=args.kz, mass_barrier=args.mass,
+                          k_spring=args.k, dtype=args.dtype, **kw)
+        return
+    if args.sweep_mass or args.sweep_k or args.sweep_kz:
+        configs = sweep_configs(args.sweep_mass or [args.mass], args.sweep_k or [args.k], args.sweep_kz or [args.kz])
+        run_sweep(configs, args.time, args.sweep_out, batch_size=args.batch, dtype=args.dtype,
+                  integrator=args.integrator, dt=args.dt, **kw)
+        return
+    if not args.output: parser.error('--output is required')
+    kw.update(integrator=args.integrator, dt=args.dt)
+    if args.compare_precision:
+        compare_precision(args.kz, args.mass, args.k, args.time, args.output, **kw)
+    else:
+        ckpt_steps = int(round(args.checkpoint_interval / (args.dt or CoupledField.dt)))
+        run_simulation(args.kz, args.mass, args.k, args.time, args.output, args.dtype,
+                       checkpoint_every=ckpt_steps, checkpoint_path=args.checkpoint, resume=args.resume,
+                       observables={o.split(':')[0]: int(o.split(':')[1]) if ':' in o else None for o in args.observe}, **kw)
+
+if __name__ == '__main__':
+    main()